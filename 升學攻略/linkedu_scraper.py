@@ -4,23 +4,109 @@ LinkedU Article Scraper
 Scrapes articles from https://linkedu.hk/article/ and formats them for RAG
 """
 
+import argparse
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
-import json
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
+import orjson
 import re
+import codecs
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Tuple, Any
 from rag_optimizer import RAGOptimizer
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Same layout as json.dump(..., ensure_ascii=False, indent=2)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+def _html_input(body: bytes, charset: Optional[str]):
+    """
+    Lexbor reads UTF-8 bytes directly, so only bodies declared in another
+    charset are decoded; pages without a charset are taken as UTF-8 (as
+    linkedu.hk serves them) instead of being sniffed. A charset Python doesn't
+    know is treated like a missing one
+    """
+    if not charset:
+        return body
+    try:
+        codec = codecs.lookup(charset)
+    except LookupError:
+        return body
+    if codec.name == 'utf-8':
+        return body
+    return body.decode(codec.name, errors='replace')
+
+class HTTPCache:
+    """
+    Remembers the ETag / Last-Modified validators, body hash and parsed
+    record of every page, so a re-run can send conditional GETs and skip
+    parsing pages that haven't changed
+    """
+    def __init__(self, filename: str = 'linkedu_http_cache.json'):
+        self.filename = filename
+        self.entries = {}
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'rb') as f:
+                    self.entries = orjson.loads(f.read())
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache {filename}: {str(e)}")
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Headers that let the server answer 304 if the page is unchanged
+        """
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def get_record(self, url: str, body: Optional[bytes] = None):
+        """
+        Return the stored record for a 304 (body is None) or for a body
+        identical to the one it was parsed from, otherwise None
+        """
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        if body is not None and entry['sha256'] != hashlib.sha256(body).hexdigest():
+            return None
+        return entry['record']
+    
+    def store(self, url: str, headers, body: bytes, record):
+        self.entries[url] = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'sha256': hashlib.sha256(body).hexdigest(),
+            'record': record
+        }
+    
+    def save(self):
+        try:
+            with open(self.filename, 'wb') as f:
+                f.write(orjson.dumps(self.entries))
+        except Exception as e:
+            logger.error(f"Error saving cache {self.filename}: {str(e)}")
+
 class LinkedUArticleScraper:
-    def __init__(self):
+    def __init__(self, cache_file: Optional[str] = 'linkedu_http_cache.json'):
         self.base_url = "https://linkedu.hk"
         self.articles_url = "https://linkedu.hk/article/"
         self.session = requests.Session()
@@ -28,63 +114,107 @@ class LinkedUArticleScraper:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': 'br, gzip, deflate',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        # Every request goes to the same host, so one pool with room for
+        # concurrent connections plus retries on transient gateway errors
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.articles_data = []
+        # Validators from previous runs; pass cache_file=None to always refetch
+        self.cache = HTTPCache(cache_file) if cache_file else None
+        
+    def _get_listing_page(self, page: int) -> List[Dict[str, str]]:
+        """
+        Fetch one page of the article listing and return the articles on it
+        """
+        # LinkedU uses pagination with _pager parameter
+        if page == 1:
+            url = self.articles_url
+        else:
+            url = f"{self.articles_url}?_pager={page}"
+        
+        logger.info(f"Scraping page {page}: {url}")
+        headers = self.cache.conditional_headers(url) if self.cache else None
+        response = self.session.get(url, headers=headers, timeout=30)
+        
+        if response.status_code == 304 and self.cache:
+            logger.info(f"Page {page} not modified, using cached articles")
+            return self.cache.get_record(url)
+        
+        response.raise_for_status()
         
-    def get_article_urls(self, max_pages: int = 14) -> List[Dict[str, str]]:
+        if self.cache:
+            page_articles = self.cache.get_record(url, response.content)
+            if page_articles is not None:
+                return page_articles
+        
+        # Only trust a charset the server actually declared
+        content_type = response.headers.get('Content-Type', '').lower()
+        charset = response.encoding if 'charset' in content_type else None
+        page_articles = self._parse_listing_page(_html_input(response.content, charset))
+        if self.cache and page_articles:
+            self.cache.store(url, response.headers, response.content, page_articles)
+        return page_articles
+    
+    def _parse_listing_page(self, html) -> List[Dict[str, str]]:
+        """
+        Extract the article cards from one listing page
+        """
+        tree = LexborHTMLParser(html)
+        
+        # Find article cards using the structure you provided
+        article_cards = tree.css('article:is(.ct-div-block, .post-item)')
+        
+        if not article_cards:
+            # Try alternative selectors
+            article_cards = tree.css('div.post-card__wrap')
+        
+        page_articles = []
+        for card in article_cards:
+            article_info = self._extract_article_info_from_card(card)
+            if article_info:
+                page_articles.append(article_info)
+        
+        return page_articles
+    
+    def get_article_urls(self, max_pages: int = 14, max_workers: int = 8) -> List[Dict[str, str]]:
         """
         Extract article URLs from the main articles page
         Returns list of dictionaries with URL, title, excerpt, etc.
         """
         articles = []
-        page = 1
         
-        while page <= max_pages:
-            try:
-                # LinkedU uses pagination with _pager parameter
-                if page == 1:
-                    url = self.articles_url
-                else:
-                    url = f"{self.articles_url}?_pager={page}"
-                
-                logger.info(f"Scraping page {page}: {url}")
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find article cards using the structure you provided
-                article_cards = soup.find_all('article', class_=['ct-div-block', 'post-item'])
-                
-                if not article_cards:
-                    # Try alternative selectors
-                    article_cards = soup.find_all('div', class_='post-card__wrap')
-                
-                if not article_cards:
-                    logger.warning(f"No articles found on page {page}")
-                    break
-                
-                page_articles = 0
-                for card in article_cards:
-                    article_info = self._extract_article_info_from_card(card)
-                    if article_info:
-                        articles.append(article_info)
-                        page_articles += 1
-                
-                logger.info(f"Found {page_articles} articles on page {page}")
-                
-                if page_articles == 0:
-                    break
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Listing pages are independent, so fetch them all up front and
+            # walk the results in page order
+            futures = [executor.submit(self._get_listing_page, page) for page in range(1, max_pages + 1)]
+            
+            for page, future in enumerate(futures, 1):
+                try:
+                    page_articles = future.result()
                     
-                page += 1
-                time.sleep(1)  # Be respectful to the server
-                
-            except Exception as e:
-                logger.error(f"Error scraping page {page}: {str(e)}")
-                break
+                    if not page_articles:
+                        logger.warning(f"No articles found on page {page}")
+                        break
+                    
+                    articles.extend(page_articles)
+                    logger.info(f"Found {len(page_articles)} articles on page {page}")
+                    
+                except Exception as e:
+                    logger.error(f"Error scraping page {page}: {str(e)}")
+                    break
+            
+            # Don't fetch pages past the end of the listing
+            for future in futures:
+                future.cancel()
         
         logger.info(f"Total articles found: {len(articles)}")
         return articles
@@ -95,20 +225,20 @@ class LinkedUArticleScraper:
         """
         try:
             # Find the title and URL
-            title_elem = card.find('h4', class_='post-card__title')
+            title_elem = card.css_first('h4.post-card__title')
             if not title_elem:
-                title_elem = card.find('a')
+                title_elem = card.css_first('a')
             
             if not title_elem:
                 return None
             
             # Get the link
-            link_elem = title_elem.find('a') if title_elem.name != 'a' else title_elem
+            link_elem = title_elem.css_first('a') if title_elem.tag != 'a' else title_elem
             if not link_elem:
                 return None
                 
-            url = link_elem.get('href', '')
-            title = link_elem.get_text(strip=True)
+            url = link_elem.attributes.get('href') or ''
+            title = link_elem.text(strip=True)
             
             if not url or not title:
                 return None
@@ -118,20 +248,20 @@ class LinkedUArticleScraper:
                 url = urljoin(self.base_url, url)
             
             # Extract excerpt/description
-            excerpt_elem = card.find('div', class_='post-card__excerpt')
-            excerpt = excerpt_elem.get_text(strip=True) if excerpt_elem else ""
+            excerpt_elem = card.css_first('div.post-card__excerpt')
+            excerpt = excerpt_elem.text(strip=True) if excerpt_elem else ""
             
             # Extract categories
-            categories_elem = card.find('span', class_='post-card__cat')
-            categories = categories_elem.get_text(strip=True) if categories_elem else ""
+            categories_elem = card.css_first('span.post-card__cat')
+            categories = categories_elem.text(strip=True) if categories_elem else ""
             
             # Extract reading time
-            reading_time_elem = card.find('div', class_='post-card__readtime')
-            reading_time = reading_time_elem.get_text(strip=True) if reading_time_elem else ""
+            reading_time_elem = card.css_first('div.post-card__readtime')
+            reading_time = reading_time_elem.text(strip=True) if reading_time_elem else ""
             
             # Extract author
-            author_elem = card.find('span', class_='name')
-            author = author_elem.get_text(strip=True) if author_elem else ""
+            author_elem = card.css_first('span.name')
+            author = author_elem.text(strip=True) if author_elem else ""
             
             return {
                 'url': url,
@@ -146,16 +276,46 @@ class LinkedUArticleScraper:
             logger.error(f"Error extracting article info: {str(e)}")
             return None
     
-    def scrape_article_content(self, article_url: str) -> Optional[Dict[str, str]]:
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Tuple[int, Mapping[str, str], bytes, Optional[str]]:
+        """
+        Conditionally fetch a page
+        Returns the status, response headers, raw body and declared charset;
+        the body is empty when the server answers 304 Not Modified
+        """
+        headers = self.cache.conditional_headers(url) if self.cache else None
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status == 304:
+                return 304, response.headers, b'', None
+            response.raise_for_status()
+            body = await response.read()
+            return response.status, response.headers, body, response.charset
+    
+    async def scrape_article_content(self, session: aiohttp.ClientSession, article_url: str) -> Optional[Dict[str, str]]:
         """
         Scrape the full content of a single article
         """
         try:
             logger.info(f"Scraping article: {article_url}")
-            response = self.session.get(article_url, timeout=30)
-            response.raise_for_status()
+            response = await self._fetch(session, article_url)
+        except Exception as e:
+            logger.error(f"Error scraping article {article_url}: {str(e)}")
+            return None
+        
+        return self._parse_article(article_url, *response)
+    
+    def _parse_article(self, article_url: str, status: int, headers: Mapping[str, str], body: bytes,
+                       charset: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Extract the content of an article from a response returned by _fetch
+        """
+        try:
+            if self.cache:
+                # Unchanged page: either a 304 or the same bytes as last time
+                cached = self.cache.get_record(article_url, None if status == 304 else body)
+                if cached is not None:
+                    return cached
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            tree = LexborHTMLParser(_html_input(body, charset))
             
             # Extract article content - look for the main content area
             content_selectors = [
@@ -169,91 +329,236 @@ class LinkedUArticleScraper:
             
             content_elem = None
             for selector in content_selectors:
-                content_elem = soup.select_one(selector)
+                content_elem = tree.css_first(selector)
                 if content_elem:
                     break
             
             if not content_elem:
                 # Fallback: look for the specific span you mentioned
-                content_elem = soup.find('span', id=lambda x: x and 'span-' in x, class_='ct-span')
+                content_elem = tree.css_first('span.ct-span[id*="span-"]')
             
             if not content_elem:
                 logger.warning(f"Could not find content for {article_url}")
                 return None
             
-            # Clean and extract content
-            content = self._clean_content(content_elem)
+            # Clean and extract content and headings in one pass
+            content, headings = self._clean_content(content_elem)
             
-            # Extract title
-            title_selectors = ['h1', '.entry-title', '.post-title', '.article-title']
-            title = ""
-            for selector in title_selectors:
-                title_elem = soup.select_one(selector)
-                if title_elem:
-                    title = title_elem.get_text(strip=True)
-                    break
+            # Extract title - <h1> comes straight from the parser's tag index,
+            # the class selectors are only compiled when a page has no <h1>
+            title_elems = tree.tags('h1')
+            title_elem = title_elems[0] if title_elems else None
+            if not title_elem:
+                for selector in ['.entry-title', '.post-title', '.article-title']:
+                    title_elem = tree.css_first(selector)
+                    if title_elem:
+                        break
+            title = title_elem.text(strip=True) if title_elem else ""
             
             # Extract metadata
             meta_description = ""
-            meta_elem = soup.find('meta', attrs={'name': 'description'})
+            meta_elem = tree.css_first('meta[name="description"]')
             if meta_elem:
-                meta_description = meta_elem.get('content', '')
+                meta_description = meta_elem.attributes.get('content') or ''
             
-            # Extract headings for structure
-            headings = []
-            for heading in content_elem.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                headings.append({
-                    'level': heading.name,
-                    'text': heading.get_text(strip=True)
-                })
-            
-            return {
+            record = {
                 'title': title,
                 'content': content,
                 'meta_description': meta_description,
                 'headings': headings,
                 'url': article_url
             }
+            if self.cache:
+                self.cache.store(article_url, headers, body, record)
+            return record
             
         except Exception as e:
             logger.error(f"Error scraping article {article_url}: {str(e)}")
             return None
     
-    def _clean_content(self, content_elem) -> str:
+    def _clean_content(self, content_elem) -> Tuple[str, List[Dict[str, str]]]:
         """
         Clean and format article content for RAG
+        Returns the content text and the headings for structure, both
+        collected from the same walk over the content nodes
         """
-        # Remove unwanted elements
-        for elem in content_elem.find_all(['script', 'style', 'nav', 'footer', 'aside']):
-            elem.decompose()
-        
-        # Remove buttons and UI elements
-        for elem in content_elem.find_all('button'):
-            elem.decompose()
-        
-        # Remove SVG icons
-        for elem in content_elem.find_all('svg'):
-            elem.decompose()
+        # Remove unwanted elements, buttons/UI elements and SVG icons
+        content_elem.strip_tags(['script', 'style', 'nav', 'footer', 'aside', 'button', 'svg'])
         
         # Convert to text while preserving structure
         content_parts = []
+        headings = []
         
-        for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td']):
-            text = elem.get_text(strip=True)
+        for elem in content_elem.css('p, h1, h2, h3, h4, h5, h6, li, td'):
+            tag = elem.tag
+            text = elem.text(strip=True)
+            is_heading = tag in HEADING_TAGS
+            
+            if is_heading:
+                headings.append({
+                    'level': tag,
+                    'text': text
+                })
+            
             if text and len(text) > 10:  # Filter out very short text
                 # Add heading markers
-                if elem.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                if is_heading:
                     content_parts.append(f"\n## {text}\n")
-                elif elem.name == 'li':
+                elif tag == 'li':
                     content_parts.append(f"• {text}")
                 else:
                     content_parts.append(text)
         
-        return '\n\n'.join(content_parts)
+        return '\n\n'.join(content_parts), headings
     
-    def scrape_all_articles(self, max_pages: int = 14, max_articles: int = None) -> List[Dict]:
+    async def _run_pipeline(self, article_urls: List[Dict[str, str]], concurrency: int,
+                            optimizer: Optional[RAGOptimizer] = None,
+                            parse_workers: int = 4) -> Tuple[List[Dict], Optional[Dict[str, Any]]]:
         """
-        Scrape all articles and return formatted JSON data
+        Fetch, parse and (with an optimizer) RAG-optimize articles as three
+        stages joined by bounded queues, so network waits, HTML parsing and
+        optimization overlap instead of running one after another
+        Returns the articles in listing order and the optimized collection
+        """
+        loop = asyncio.get_running_loop()
+        fetch_q, parse_q, out_q = (asyncio.Queue(maxsize=32) for _ in range(3))
+        scraped_at = datetime.now().isoformat()
+        articles = []
+        pending_documents = []
+        
+        async def fetch_stage(session: aiohttp.ClientSession):
+            while True:
+                item = await fetch_q.get()
+                if item is None:
+                    return
+                i, article_info = item
+                logger.info(f"Processing article {i}/{len(article_urls)}: {article_info['title']}")
+                try:
+                    logger.info(f"Scraping article: {article_info['url']}")
+                    response = await self._fetch(session, article_info['url'])
+                    await parse_q.put((i, article_info, response))
+                except Exception as e:
+                    logger.error(f"Error scraping article {article_info['url']}: {str(e)}")
+                
+                # Be respectful to the server
+                await asyncio.sleep(2)
+        
+        async def parse_stage(executor: ThreadPoolExecutor):
+            while True:
+                item = await parse_q.get()
+                if item is None:
+                    return
+                i, article_info, response = item
+                full_content = await loop.run_in_executor(executor, self._parse_article, article_info['url'], *response)
+                if full_content:
+                    await out_q.put((i, self._build_article(i, article_info, full_content, scraped_at)))
+        
+        async def optimize_stage(pool: Optional[ProcessPoolExecutor]):
+            while True:
+                item = await out_q.get()
+                if item is None:
+                    return
+                articles.append(item)
+                if pool:
+                    # The document id is fixed up once the final order is known
+                    i, article_data = item
+                    try:
+                        future = loop.run_in_executor(
+                            pool, optimizer._try_optimize_single_article, article_data, i, scraped_at
+                        )
+                    except Exception as e:
+                        logger.error(f"Error optimizing article {i}: {str(e)}")
+                        continue
+                    pending_documents.append((i, future))
+        
+        async def feed_stages(fetchers: List[asyncio.Task], parsers: List[asyncio.Task]):
+            for item in enumerate(article_urls, 1):
+                await fetch_q.put(item)
+            for _ in fetchers:
+                await fetch_q.put(None)
+            await asyncio.gather(*fetchers)
+            
+            for _ in parsers:
+                await parse_q.put(None)
+            await asyncio.gather(*parsers)
+            
+            await out_q.put(None)
+        
+        pool = ProcessPoolExecutor() if optimizer else None
+        try:
+            connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+            async with aiohttp.ClientSession(headers=dict(self.session.headers), connector=connector) as session:
+                with ThreadPoolExecutor(max_workers=parse_workers) as executor:
+                    fetchers = [asyncio.create_task(fetch_stage(session)) for _ in range(concurrency)]
+                    parsers = [asyncio.create_task(parse_stage(executor)) for _ in range(parse_workers)]
+                    optimizer_task = asyncio.create_task(optimize_stage(pool))
+                    tasks = fetchers + parsers + [optimizer_task]
+                    tasks.append(asyncio.create_task(feed_stages(fetchers, parsers)))
+                    
+                    # A stage that dies would leave the ones feeding it blocked
+                    # on a full queue, so the first failure stops them all
+                    try:
+                        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                        for task in done:
+                            if task.exception():
+                                raise task.exception()
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+            
+            documents = []
+            for i, future in pending_documents:
+                try:
+                    documents.append((i, await future))
+                except Exception as e:
+                    logger.error(f"Error optimizing article {i}: {str(e)}")
+        finally:
+            if pool:
+                pool.shutdown()
+        
+        articles.sort(key=lambda item: item[0])
+        if not optimizer:
+            return [article for _, article in articles], None
+        
+        # Number documents by their position among the scraped articles,
+        # as optimize_articles_for_rag does
+        positions = {i: position for position, (i, _) in enumerate(articles, 1)}
+        documents.sort(key=lambda item: item[0])
+        optimized_articles = []
+        for i, document in documents:
+            if document:
+                document['id'] = f"linkedu_{positions[i]:04d}"
+                optimized_articles.append(document)
+        
+        return [article for _, article in articles], optimizer._build_collection(optimized_articles, scraped_at)
+    
+    def _build_article(self, i: int, article_info: Dict[str, str], full_content: Dict[str, str], scraped_at: str) -> Dict:
+        """
+        Combine listing metadata with the scraped content
+        """
+        return {
+            'id': f"linkedu_{i:04d}",
+            'source': 'LinkedU',
+            'source_url': article_info['url'],
+            'title': full_content['title'] or article_info['title'],
+            'excerpt': article_info['excerpt'],
+            'content': full_content['content'],
+            'meta_description': full_content['meta_description'],
+            'categories': article_info['categories'],
+            'author': article_info['author'],
+            'reading_time': article_info['reading_time'],
+            'headings': full_content['headings'],
+            'scraped_at': scraped_at,
+            'content_length': len(full_content['content']),
+            'language': 'zh-HK',  # Hong Kong Chinese
+            'topics': self._extract_topics(article_info['categories'])
+        }
+    
+    def _scrape(self, max_pages: int, max_articles: Optional[int], concurrency: int,
+                optimizer: Optional[RAGOptimizer]) -> Tuple[List[Dict], Optional[Dict[str, Any]]]:
+        """
+        Collect the article URLs, then run the pipeline over them
         """
         # Get article URLs
         article_urls = self.get_article_urls(max_pages)
@@ -261,40 +566,27 @@ class LinkedUArticleScraper:
         if max_articles:
             article_urls = article_urls[:max_articles]
         
-        scraped_articles = []
+        result = asyncio.run(self._run_pipeline(article_urls, concurrency, optimizer))
         
-        for i, article_info in enumerate(article_urls, 1):
-            logger.info(f"Processing article {i}/{len(article_urls)}: {article_info['title']}")
-            
-            # Scrape full content
-            full_content = self.scrape_article_content(article_info['url'])
-            
-            if full_content:
-                # Combine metadata with content
-                article_data = {
-                    'id': f"linkedu_{i:04d}",
-                    'source': 'LinkedU',
-                    'source_url': article_info['url'],
-                    'title': full_content['title'] or article_info['title'],
-                    'excerpt': article_info['excerpt'],
-                    'content': full_content['content'],
-                    'meta_description': full_content['meta_description'],
-                    'categories': article_info['categories'],
-                    'author': article_info['author'],
-                    'reading_time': article_info['reading_time'],
-                    'headings': full_content['headings'],
-                    'scraped_at': datetime.now().isoformat(),
-                    'content_length': len(full_content['content']),
-                    'language': 'zh-HK',  # Hong Kong Chinese
-                    'topics': self._extract_topics(article_info['categories'])
-                }
-                
-                scraped_articles.append(article_data)
-                
-            # Be respectful to the server
-            time.sleep(2)
+        if self.cache:
+            self.cache.save()
         
-        return scraped_articles
+        return result
+    
+    def scrape_all_articles(self, max_pages: int = 14, max_articles: int = None, concurrency: int = 10) -> List[Dict]:
+        """
+        Scrape all articles and return formatted JSON data
+        """
+        articles, _ = self._scrape(max_pages, max_articles, concurrency, None)
+        return articles
+    
+    def scrape_and_optimize(self, max_pages: int = 14, max_articles: int = None,
+                            concurrency: int = 10) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Scrape all articles and RAG-optimize them while the crawl is running
+        Returns the articles and the RAG-optimized collection
+        """
+        return self._scrape(max_pages, max_articles, concurrency, RAGOptimizer())
     
     def _extract_topics(self, categories: str) -> List[str]:
         """
@@ -307,43 +599,32 @@ class LinkedUArticleScraper:
         topics = re.split(r'[．·,，\s]+', categories)
         return [topic.strip() for topic in topics if topic.strip()]
     
-    def save_to_json(self, articles: List[Dict], filename: str = 'linkedu_articles.json', rag_optimized: bool = True):
+    def save_to_json(self, articles: List[Dict], filename: str = 'linkedu_articles.json', rag_optimized: bool = True,
+                     also_write_original: bool = False, optimized_data: Optional[Dict[str, Any]] = None):
         """
         Save articles to JSON file with optional RAG optimization
+        With rag_optimized, the original format is only written as well when
+        also_write_original is set; pass optimized_data from
+        scrape_and_optimize to skip optimizing again
         """
         try:
             if rag_optimized:
-                # Use RAG optimizer
-                optimizer = RAGOptimizer()
-                optimized_data = optimizer.optimize_articles_for_rag(articles)
+                if optimized_data is None:
+                    # Use RAG optimizer
+                    optimizer = RAGOptimizer()
+                    optimized_data = optimizer.optimize_articles_for_rag(articles)
                 
                 # Save RAG-optimized version
                 rag_filename = filename.replace('.json', '_rag_optimized.json')
-                with open(rag_filename, 'w', encoding='utf-8') as f:
-                    json.dump(optimized_data, f, ensure_ascii=False, indent=2)
+                with open(rag_filename, 'wb') as f:
+                    f.write(orjson.dumps(optimized_data, option=JSON_OPTIONS))
                 
                 logger.info(f"Saved {len(articles)} articles (RAG optimized) to {rag_filename}")
-                
-                # Also save original format
-                original_data = {
-                    'metadata': {
-                        'source': 'LinkedU Articles',
-                        'scraped_at': datetime.now().isoformat(),
-                        'total_articles': len(articles),
-                        'scraper_version': '1.0'
-                    },
-                    'articles': articles
-                }
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(original_data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Saved {len(articles)} articles (original) to {filename}")
-                
-            else:
-                # Save original format only
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump({
+            
+            if not rag_optimized or also_write_original:
+                # Save original format
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps({
                         'metadata': {
                             'source': 'LinkedU Articles',
                             'scraped_at': datetime.now().isoformat(),
@@ -351,33 +632,44 @@ class LinkedUArticleScraper:
                             'scraper_version': '1.0'
                         },
                         'articles': articles
-                    }, f, ensure_ascii=False, indent=2)
+                    }, option=JSON_OPTIONS))
                 
-                logger.info(f"Saved {len(articles)} articles to {filename}")
+                logger.info(f"Saved {len(articles)} articles (original) to {filename}")
             
         except Exception as e:
             logger.error(f"Error saving to JSON: {str(e)}")
 
+def parse_args():
+    """
+    Parse command line options
+    """
+    parser = argparse.ArgumentParser(description="Scrape LinkedU articles and save them for RAG")
+    parser.add_argument('--write-original', action='store_true',
+                        help="Also save linkedu_articles.json in the original format, which rag_optimizer.py reads")
+    return parser.parse_args()
+
 def main():
     """
     Main function to run the scraper
     """
+    args = parse_args()
     scraper = LinkedUArticleScraper()
     
     # Scrape articles
     print("Starting LinkedU article scraping...")
-    articles = scraper.scrape_all_articles(max_pages=14, max_articles=None)  # Scrape all 14 pages
+    articles, optimized_data = scraper.scrape_and_optimize(max_pages=14, max_articles=None)  # Scrape all 14 pages
     
     if articles:
         # Save to JSON with RAG optimization
-        scraper.save_to_json(articles, rag_optimized=True)
+        scraper.save_to_json(articles, rag_optimized=True, also_write_original=args.write_original, optimized_data=optimized_data)
         
         # Print summary
         print(f"\nScraping completed!")
         print(f"Total articles scraped: {len(articles)}")
         print(f"Average content length: {sum(a['content_length'] for a in articles) / len(articles):.0f} characters")
-        print(f"Original format saved to: linkedu_articles.json")
         print(f"RAG-optimized format saved to: linkedu_articles_rag_optimized.json")
+        if args.write_original:
+            print(f"Original format saved to: linkedu_articles.json")
         print(f"\n🎯 For RAG/chatbot use, use the '_rag_optimized.json' file!")
     else:
         print("No articles were scraped successfully.")
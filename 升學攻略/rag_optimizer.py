@@ -4,40 +4,86 @@ RAG Optimization Module
 Optimizes scraped articles for better RAG retrieval and question answering
 """
 
-import json
+import orjson
 import re
-from typing import List, Dict, Any
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import and shared by every article
+_WHITESPACE_RE = re.compile(r'\s+')
+_DISALLOWED_RUN_RE = re.compile(r'[^\w\s\u4e00-\u9fff\u3400-\u4dbf\u20000-\u2a6df\u2a700-\u2b73f\u2b740-\u2b81f\u2b820-\u2ceaf\uf900-\ufaff\u3300-\u33ff\ufe30-\ufe4f\uf900-\ufaff\u2f800-\u2fa1f，。！？；：""''（）【】《》、]+')
+_PUNCT_RE = re.compile(r'\s*[，。！？；：]\s*')
+_SECTION_SPLIT_RE = re.compile(r'\n##\s+')
+_TOPIC_SPLIT_RE = re.compile(r'[．·,，\s]+')
+_CJK_WORD_RE = re.compile(r'[\u4e00-\u9fff]{2,}|[A-Za-z]{3,}')
+
+# Educational topic patterns for LinkedU, fused into one alternation so the
+# text is scanned once instead of once per topic group. The lookahead reports
+# terms that overlap, as the separate per-group scans did (升學 and 學院 in
+# 升學院校); within the first group a scan of 大學院 only ever found 大學,
+# hence the lookbehind
+_EDU_ALT = re.compile(
+    r'(?=(大學|(?<!大)學院|(?<!大)學校'
+    r'|學科|專業|課程'
+    r'|入學|申請|錄取'
+    r'|學費|獎學金|資助'
+    r'|海外|留學|遊學'
+    r'|英國|美國|加拿大|澳洲|新西蘭'
+    r'|IELTS|TOEFL|SAT|A-Level|IB'
+    r'|碩士|學士|博士'
+    r'|升學|轉校|銜接'
+    r'|簽證|移民))'
+)
+
+# Common educational keywords in Chinese
+_KEYWORD_PATTERNS = [re.compile(p) for p in [
+    r'[A-Z]{2,}|\d+年',  # Acronyms like IELTS, SAT; years
+    r'第\d+',   # Rankings
+    r'(?:學費|費用)\s*[:：]\s*[^\n]+',  # Fees
+    r'(?:入學要求|申請條件)[:：][^\n]+',  # Requirements
+    r'(?:截止日期|申請期限)[:：][^\n]+'   # Deadlines
+]]
+
 class RAGOptimizer:
     def __init__(self):
         self.stopwords = {
             '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一個', '上', '也', '很', '到', '說', '要', '去', '你', '會', '著', '沒有', '看', '好', '自己', '這', '那', '可以', '這個', '那個', '但是', '因為', '所以', '如果', '雖然', '然後', '還是', '已經', '應該', '可能', '時候', '地方', '問題', '方法', '情況', '時間', '工作', '生活', '學習', '知道', '認為', '覺得', '希望', '需要', '想要', '開始', '進行', '發現', '出現', '產生', '形成', '建立', '創造', '發展', '提高', '增加', '減少', '改變', '影響', '作用', '關係', '聯繫', '比較', '不同', '相同', '重要', '主要', '基本', '一般', '特別', '尤其', '特殊', '具體', '詳細', '簡單', '複雜', '容易', '困難', '可能', '不可能', '必須', '應當', '能夠', '無法', '允許', '禁止', '包括', '除了', '關於', '對於', '根據', '按照', '通過', '利用', '使用', '採用', '選擇', '決定', '確定', '安排', '計劃', '準備', '完成', '實現', '達到', '獲得', '取得', '成功', '失敗', '正確', '錯誤', '好的', '壞的', '大的', '小的', '多的', '少的', '高的', '低的', '長的', '短的', '新的', '舊的'
         }
     
-    def optimize_articles_for_rag(self, articles: List[Dict]) -> Dict[str, Any]:
+    def optimize_articles_for_rag(self, articles: List[Dict], max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Optimize articles for RAG by restructuring and enhancing content
+        Articles are independent, so they are spread across worker processes
+        """
+        now_iso = datetime.now().isoformat()
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                self._try_optimize_single_article,
+                articles,
+                range(1, len(articles) + 1),
+                repeat(now_iso),
+                chunksize=8
+            )
+            optimized_articles = [optimized for optimized in results if optimized]
+        
+        return self._build_collection(optimized_articles, now_iso)
+    
+    def _build_collection(self, optimized_articles: List[Dict[str, Any]], optimization_date: str) -> Dict[str, Any]:
+        """
+        Wrap optimized articles with the collection metadata
         """
-        optimized_articles = []
-        
-        for i, article in enumerate(articles):
-            try:
-                optimized = self._optimize_single_article(article, i + 1)
-                if optimized:
-                    optimized_articles.append(optimized)
-            except Exception as e:
-                logger.error(f"Error optimizing article {i+1}: {str(e)}")
-                continue
-        
         return {
             'metadata': {
                 'source': 'LinkedU Articles (RAG Optimized)',
                 'total_documents': len(optimized_articles),
-                'optimization_date': datetime.now().isoformat(),
+                'optimization_date': optimization_date,
                 'format_version': '2.0',
                 'optimization_features': [
                     'Semantic chunking',
@@ -51,7 +97,17 @@ class RAGOptimizer:
             'documents': optimized_articles
         }
     
-    def _optimize_single_article(self, article: Dict, index: int) -> Dict[str, Any]:
+    def _try_optimize_single_article(self, article: Dict, index: int, indexed_at: str) -> Optional[Dict[str, Any]]:
+        """
+        Optimize a single article, logging and skipping it on failure
+        """
+        try:
+            return self._optimize_single_article(article, index, indexed_at)
+        except Exception as e:
+            logger.error(f"Error optimizing article {index}: {str(e)}")
+            return None
+    
+    def _optimize_single_article(self, article: Dict, index: int, indexed_at: str) -> Dict[str, Any]:
         """
         Optimize a single article for RAG retrieval
         """
@@ -63,8 +119,9 @@ class RAGOptimizer:
         if not title or not content:
             return None
         
-        # Create semantic chunks
-        chunks = self._create_semantic_chunks(content, title)
+        # Split into sections once, then create semantic chunks
+        sections = self._split_sections(content)
+        chunks = self._create_semantic_chunks(sections, title)
         
         # Extract topics and keywords
         topics = self._extract_comprehensive_topics(article)
@@ -89,13 +146,13 @@ class RAGOptimizer:
             'qa_pairs': qa_pairs,
             'structure': {
                 'headings': self._extract_clean_headings(article.get('headings', [])),
-                'sections': self._identify_sections(content)
+                'sections': self._identify_sections(sections)
             },
             'metadata': {
                 'content_type': 'educational_article',
                 'language': 'zh-HK',
                 'source': 'LinkedU',
-                'indexed_at': datetime.now().isoformat()
+                'indexed_at': indexed_at
             }
         }
     
@@ -106,44 +163,52 @@ class RAGOptimizer:
         if not text:
             return ""
         
-        # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text.strip())
+        # Remove common formatting artifacts, a whole run at a time
+        text = _DISALLOWED_RUN_RE.sub(' ', text)
         
-        # Remove common formatting artifacts
-        text = re.sub(r'[^\w\s\u4e00-\u9fff\u3400-\u4dbf\u20000-\u2a6df\u2a700-\u2b73f\u2b740-\u2b81f\u2b820-\u2ceaf\uf900-\ufaff\u3300-\u33ff\ufe30-\ufe4f\uf900-\ufaff\u2f800-\u2fa1f，。！？；：""''（）【】《》、]', ' ', text)
-        
-        # Normalize punctuation
-        text = re.sub(r'\s*[，。！？；：]\s*', '，', text)
-        text = re.sub(r'\s+', ' ', text)
+        # Normalize punctuation, then whitespace; the punctuation pattern
+        # absorbs any surrounding whitespace, so one whitespace pass suffices
+        text = _PUNCT_RE.sub('，', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
-    def _create_semantic_chunks(self, content: str, title: str) -> List[Dict[str, str]]:
+    def _split_sections(self, content: str) -> List[Tuple[int, str, str]]:
         """
-        Create semantically meaningful chunks for better retrieval
+        Split content by headings into (index, heading, body) tuples
+        The index is the section's position in the split, blank parts skipped
         """
-        chunks = []
-        
-        # Split by headings and paragraphs
-        sections = re.split(r'\n##\s+', content)
+        sections = []
         
-        for i, section in enumerate(sections):
+        for i, section in enumerate(_SECTION_SPLIT_RE.split(content)):
             if not section.strip():
                 continue
             
             # Extract heading if present
             lines = section.split('\n')
-            heading = lines[0].strip() if lines else ""
-            section_content = '\n'.join(lines[1:]).strip() if len(lines) > 1 else section.strip()
-            
+            heading = lines[0].strip()
+            body = '\n'.join(lines[1:]).strip() if len(lines) > 1 else section.strip()
+            sections.append((i, heading, body))
+        
+        return sections
+    
+    def _create_semantic_chunks(self, sections: List[Tuple[int, str, str]], title: str) -> List[Dict[str, str]]:
+        """
+        Create semantically meaningful chunks for better retrieval
+        """
+        chunks = []
+        
+        for i, heading, section_content in sections:
             if len(section_content) < 50:  # Skip very short sections
                 continue
             
-            # Further split long sections into paragraphs
-            paragraphs = [p.strip() for p in section_content.split('\n\n') if p.strip()]
+            # Further split long sections into paragraphs, stripping each
+            # once and measuring it once
+            paragraphs = filter(None, map(str.strip, section_content.split('\n\n')))
             
             for j, paragraph in enumerate(paragraphs):
-                if len(paragraph) < 30:  # Skip very short paragraphs
+                length = len(paragraph)
+                if length < 30:  # Skip very short paragraphs
                     continue
                 
                 chunk_id = f"chunk_{i}_{j}" if j > 0 else f"chunk_{i}"
@@ -153,7 +218,7 @@ class RAGOptimizer:
                     'heading': heading,
                     'content': paragraph,
                     'context': f"{title} - {heading}" if heading else title,
-                    'length': len(paragraph)
+                    'length': length
                 })
         
         return chunks
@@ -167,32 +232,16 @@ class RAGOptimizer:
         # From categories
         categories = article.get('categories', '')
         if categories:
-            category_topics = re.split(r'[．·,，\s]+', categories)
+            category_topics = _TOPIC_SPLIT_RE.split(categories)
             topics.update([t.strip() for t in category_topics if t.strip()])
         
         # From title and content
         title = article.get('title', '')
         content = article.get('content', '')
         
-        # Educational topic patterns for LinkedU
-        education_patterns = [
-            r'(大學|學院|學校)',
-            r'(學科|專業|課程)',
-            r'(入學|申請|錄取)',
-            r'(學費|獎學金|資助)',
-            r'(海外|留學|遊學)',
-            r'(英國|美國|加拿大|澳洲|新西蘭)',
-            r'(IELTS|TOEFL|SAT|A-Level|IB)',
-            r'(碩士|學士|博士)',
-            r'(升學|轉校|銜接)',
-            r'(簽證|移民)'
-        ]
-        
         text_to_analyze = f"{title} {content}".lower()
         
-        for pattern in education_patterns:
-            matches = re.findall(pattern, text_to_analyze)
-            topics.update(matches)
+        topics.update(_EDU_ALT.findall(text_to_analyze))
         
         # Clean and filter topics
         cleaned_topics = []
@@ -207,33 +256,19 @@ class RAGOptimizer:
         """
         Extract important keywords for search
         """
-        # Common educational keywords in Chinese
-        important_patterns = [
-            r'[A-Z]{2,}',  # Acronyms like IELTS, SAT
-            r'\d+年',  # Years
-            r'第\d+',   # Rankings
-            r'(?:學費|費用)\s*[:：]\s*[^\n]+',  # Fees
-            r'(?:入學要求|申請條件)[:：][^\n]+',  # Requirements
-            r'(?:截止日期|申請期限)[:：][^\n]+'   # Deadlines
-        ]
-        
         keywords = set()
         
-        for pattern in important_patterns:
-            matches = re.findall(pattern, text)
+        for pattern in _KEYWORD_PATTERNS:
+            matches = pattern.findall(text)
             keywords.update([m.strip() for m in matches])
         
         # Extract high-frequency meaningful terms
-        words = re.findall(r'[\u4e00-\u9fff]{2,}|[A-Za-z]{3,}', text)
-        word_freq = {}
-        
-        for word in words:
-            if word not in self.stopwords and len(word) > 1:
-                word_freq[word] = word_freq.get(word, 0) + 1
+        words = _CJK_WORD_RE.findall(text)
+        filtered = [word for word in words if len(word) > 1 and word not in self.stopwords]
         
         # Get top frequent words
-        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-        keywords.update([word for word, freq in top_words if freq > 2])
+        top_words = Counter(filtered).most_common(20)
+        keywords.update(word for word, freq in top_words if freq > 2)
         
         return sorted(list(keywords))
     
@@ -308,28 +343,20 @@ class RAGOptimizer:
         
         return clean_headings
     
-    def _identify_sections(self, content: str) -> List[Dict[str, str]]:
+    def _identify_sections(self, sections: List[Tuple[int, str, str]]) -> List[Dict[str, str]]:
         """
         Identify main sections in content
         """
-        sections = []
-        section_parts = re.split(r'\n##\s+', content)
+        main_sections = []
         
-        for i, part in enumerate(section_parts):
-            if not part.strip():
-                continue
-            
-            lines = part.split('\n')
-            section_title = lines[0].strip() if lines else f"Section {i+1}"
-            section_content = '\n'.join(lines[1:]).strip() if len(lines) > 1 else part.strip()
-            
+        for _, section_title, section_content in sections:
             if section_content and len(section_content) > 50:
-                sections.append({
+                main_sections.append({
                     'title': section_title,
                     'content': section_content[:200] + "..." if len(section_content) > 200 else section_content
                 })
         
-        return sections
+        return main_sections
     
     def _create_summary(self, content: str) -> str:
         """
@@ -348,14 +375,14 @@ def optimize_for_rag(input_file: str, output_file: str):
     """
     Legacy function for backward compatibility
     """
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(input_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
     optimizer = RAGOptimizer()
     optimized_data = optimizer.optimize_articles_for_rag(data.get('articles', []))
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(optimized_data, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(optimized_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"✅ Optimized {optimized_data['metadata']['total_documents']} articles for RAG")
     print(f"📄 Output saved to: {output_file}")
@@ -371,6 +398,7 @@ def main():
         optimize_for_rag(input_file, output_file)
     except FileNotFoundError:
         print(f"❌ Input file '{input_file}' not found")
+        print("   Run linkedu_scraper.py with --write-original to save it")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
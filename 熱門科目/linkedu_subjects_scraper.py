@@ -10,17 +10,33 @@ This script will:
 3. Save the content in a JSON format optimized for RAG retrieval
 """
 
+import io
 import os
 import re
-import json
 import time
+import gzip
+import zlib
+import asyncio
+import hashlib
 import logging
+from bisect import bisect_right
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import accumulate
 from pathlib import Path
 from urllib.parse import urljoin
 
+import aiohttp
+import orjson
 import requests
-from bs4 import BeautifulSoup
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
 
 # Configure logging
 logging.basicConfig(
@@ -29,322 +45,737 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# LinkedU serves UTF-8; without this libxml2 falls back to Latin-1 for
+# pages that don't declare a charset
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Text nodes as BeautifulSoup's get_text() sees them: comments and the
+# contents of script/style/template elements don't count
+_text_nodes = etree.XPath('.//text()[not(parent::script or parent::style or parent::template)]')
+
+# Selectors are compiled to XPath once here rather than on every lookup
+_SEL_SUBJECT_LINK = CSSSelector('a.ct-link', translator='html')
+_SEL_CHINESE_NAME = CSSSelector('h3.ct-headline span.ct-span', translator='html')
+_SEL_ENGLISH_NAME = CSSSelector('h4.ct-headline span.ct-span', translator='html')
+_SEL_UPDATED_DATE = CSSSelector('.oxy-post-modified-date', translator='html')
+_SEL_AUTHOR_NAME = CSSSelector('.post__author-name span.ct-span', translator='html')
+_SEL_AUTHOR_TITLE = CSSSelector('.post__author-title span.ct-span', translator='html')
+_SEL_CONTENT = CSSSelector('.post-content .ct-span', translator='html')
+_SEL_SKILLS = CSSSelector('.subject__skill.info-wrap', translator='html')
+_SEL_REQUIREMENT = CSSSelector('.subject-requirement', translator='html')
+_SEL_REQUIREMENT_TITLE = CSSSelector('.tf-title', translator='html')
+_SEL_REQUIREMENT_CONTENT = CSSSelector('.info-wrap', translator='html')
+_SEL_SCHOOL_CARD = CSSSelector('.school-card__wrap', translator='html')
+_SEL_SCHOOL_NAME = CSSSelector('.school-card__title a', translator='html')
+_SEL_SCHOOL_DESC = CSSSelector('.school-card__excerpt', translator='html')
+_SEL_RANKING_ROW = CSSSelector('.school-ranking__wrap', translator='html')
+_SEL_CELL = CSSSelector('td', translator='html')
+_SEL_LINK = CSSSelector('a', translator='html')
+
+# The article, recommendation and ranking sections of a subject page in a
+# single query. id() reads libxml2's id table instead of testing every
+# element of the page the way '#recommendation' does, and the class test
+# only runs on <article> elements
+_SUBJECT_PAGE_SECTIONS = etree.XPath(
+    "id('recommendation') | id('rankings') | "
+    "//article[contains(concat(' ', normalize-space(@class), ' '), ' ct-div-block ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' subject-content ')]"
+)
+
+# orjson writes non-ASCII text as-is, matching json.dump(ensure_ascii=False)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Requirement titles in chunk ids: spaces become underscores, full-width
+# brackets are dropped
+_REQUIREMENT_SLUG_TABLE = str.maketrans({' ': '_', '（': None, '）': None})
+
+_DATE_RE = re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日')
+_WS_RE = re.compile(r'\s+')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _parse_html(content):
+    """Parse HTML bytes into an lxml element tree."""
+    return lxml.html.fromstring(content, parser=_HTML_PARSER)
+
+def _select_one(elem, selector):
+    """Return the first element matching a compiled CSS selector, or None."""
+    matches = selector(elem)
+    return matches[0] if matches else None
+
+def _get_text(elem, strip=False):
+    """Return the text of an element, optionally stripping each piece."""
+    if strip:
+        return ''.join(text.strip() for text in _text_nodes(elem))
+    return ''.join(_text_nodes(elem))
+
+def _iter_descendants(elem):
+    """
+    Yield everything below an element in document order, like
+    BeautifulSoup's .descendants: elements, and strings for text, tails
+    and comments.
+    """
+    if elem.text:
+        yield elem.text
+    for child in elem:
+        if isinstance(child.tag, str):
+            yield child
+            yield from _iter_descendants(child)
+        elif child.text:
+            # Comments and processing instructions
+            yield child.text
+        if child.tail:
+            yield child.tail
+
+def _has_class(elem, name):
+    """Whether an element's class attribute contains the given class."""
+    return name in (elem.get('class') or '').split()
+
+def _is_subject_list(elem):
+    """Whether an element is the popular-subjects list container."""
+    return (elem.tag == 'div' and elem.get('id') == '_dynamic_list-39-29463'
+            and _has_class(elem, 'oxy-dynamic-list'))
+
+def _parse_subject_item(item):
+    """Extract url and names from a subject list item, or None if it has no usable link."""
+    link_element = _select_one(item, _SEL_SUBJECT_LINK)
+    if link_element is None:
+        return None
+        
+    url = link_element.get('href', '')
+    
+    # Get Chinese name
+    chinese_name_elem = _select_one(link_element, _SEL_CHINESE_NAME)
+    chinese_name = _get_text(chinese_name_elem) if chinese_name_elem is not None else ''
+    
+    # Get English name
+    english_name_elem = _select_one(link_element, _SEL_ENGLISH_NAME)
+    english_name = _get_text(english_name_elem) if english_name_elem is not None else ''
+    
+    if url and english_name:
+        return {
+            'url': url,
+            'chinese_name': chinese_name,
+            'english_name': english_name
+        }
+    return None
+
+def _parse_subject_page(html, url, subject_data):
+    """
+    Extract article content from the fetched HTML of a subject page.
+    Kept at module level so it can run in a worker process.
+    """
+    logger.info(f"Extracting content from {url}")
+    tree = _parse_html(html)
+    
+    # Locate the sections in one pass; everything else is looked up
+    # inside them
+    article = schools_section = rankings_section = None
+    for elem in _SUBJECT_PAGE_SECTIONS(tree):
+        elem_id = elem.get('id')
+        if elem_id == 'recommendation' and schools_section is None:
+            schools_section = elem
+        elif elem_id == 'rankings' and rankings_section is None:
+            rankings_section = elem
+        if article is None and elem.tag == 'article':
+            classes = elem.get('class', '').split()
+            if 'ct-div-block' in classes and 'subject-content' in classes:
+                article = elem
+    
+    # Extract article metadata and content
+    if article is None:
+        logger.error(f"Article content not found at {url}")
+        return None
+    
+    # Extract last updated date
+    updated_date_elem = _select_one(article, _SEL_UPDATED_DATE)
+    updated_date_text = _get_text(updated_date_elem, strip=True) if updated_date_elem is not None else ''
+    last_updated = ''
+    
+    if updated_date_text:
+        # Extract date from text like "最後更新於 2024年10月10日"
+        date_match = _DATE_RE.search(updated_date_text)
+        if date_match:
+            year, month, day = date_match.groups()
+            last_updated = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+    
+    # Extract author info
+    author_name_elem = _select_one(article, _SEL_AUTHOR_NAME)
+    author_name = _get_text(author_name_elem, strip=True) if author_name_elem is not None else ''
+    
+    author_title_elem = _select_one(article, _SEL_AUTHOR_TITLE)
+    author_title = _get_text(author_title_elem, strip=True) if author_title_elem is not None else ''
+    
+    # Extract main content
+    content_elem = _select_one(article, _SEL_CONTENT)
+    content_parts = []
+    if content_elem is not None:
+        # Extract all text content while preserving structure
+        for elem in _iter_descendants(content_elem):
+            if isinstance(elem, str):  # Text node
+                if elem.strip():
+                    content_parts.append(elem.strip())
+            elif elem.tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                heading_text = _get_text(elem, strip=True)
+                content_parts.append(f" {heading_text}.")
+            elif elem.tag == 'li':
+                item_text = _get_text(elem, strip=True)
+                content_parts.append(f" • {item_text}.")
+            elif elem.tag == 'p':
+                para_text = _get_text(elem, strip=True)
+                if para_text:
+                    content_parts.append(para_text)
+    content = ' '.join(content_parts)
+    
+    # Extract skills section
+    skills_elem = _select_one(article, _SEL_SKILLS)
+    skills_text = ''
+    if skills_elem is not None:
+        skills_text = _get_text(skills_elem, strip=True)
+    
+    # Extract requirements sections
+    requirements = []
+    for req_elem in _SEL_REQUIREMENT(article):
+        title_elem = _select_one(req_elem, _SEL_REQUIREMENT_TITLE)
+        content_elem = _select_one(req_elem, _SEL_REQUIREMENT_CONTENT)
+    
+        if title_elem is not None and content_elem is not None:
+            req_title = _get_text(title_elem, strip=True)
+            req_content = _get_text(content_elem, strip=True)
+            requirements.append({
+                'title': req_title,
+                'content': req_content
+            })
+    
+    # Get recommended schools if available
+    recommended_schools = []
+    if schools_section is not None:
+        for school_card in _SEL_SCHOOL_CARD(schools_section):
+            school_name_elem = _select_one(school_card, _SEL_SCHOOL_NAME)
+            school_desc_elem = _select_one(school_card, _SEL_SCHOOL_DESC)
+    
+            if school_name_elem is not None:
+                school_name = _get_text(school_name_elem, strip=True)
+                school_url = school_name_elem.get('href', '')
+                school_desc = _get_text(school_desc_elem, strip=True) if school_desc_elem is not None else ''
+    
+                recommended_schools.append({
+                    'name': school_name,
+                    'url': school_url,
+                    'description': school_desc
+                })
+    
+    # Get rankings if available
+    rankings = []
+    if rankings_section is not None:
+        for rank_row in _SEL_RANKING_ROW(rankings_section):
+            rank_cells = _SEL_CELL(rank_row)
+            if len(rank_cells) >= 2:
+                rank_num = _get_text(rank_cells[0], strip=True)
+                school_elem = _select_one(rank_cells[1], _SEL_LINK)
+                if school_elem is not None:
+                    school_name = _get_text(school_elem, strip=True)
+                    school_url = school_elem.get('href', '')
+                    rankings.append({
+                        'rank': rank_num,
+                        'school': school_name,
+                        'url': school_url
+                    })
+    
+    # Compile subject data
+    subject_data.update({
+        'url': url,
+        'last_updated': last_updated,
+        'author': {
+            'name': author_name,
+            'title': author_title
+        },
+        'content': content.strip(),
+        'skills_info': skills_text,
+        'requirements': requirements,
+        'recommended_schools': recommended_schools,
+        'rankings': rankings,
+    })
+    
+    return subject_data
+
+@lru_cache(maxsize=4096)
+def clean_text(text):
+    """
+    Clean text by removing unnecessary whitespace and newlines.
+    
+    Memoized: the same requirement texts and school descriptions recur
+    across subjects.
+    """
+    if not text:
+        return ""
+        
+    # Replace runs of whitespace, line breaks included, with a single
+    # space and remove unnecessary whitespace at the ends
+    return _WS_RE.sub(' ', text).strip()
+
+def _pack_sentences(sentences, limit):
+    """
+    Greedily pack sentences into space-joined chunks.
+    
+    A sentence is added to the current chunk while the chunk's joined length
+    plus the sentence stays within limit; a single over-long sentence gets a
+    chunk of its own. Chunk ends are found by bisecting the running joined
+    length instead of testing each sentence in turn. Sentences are assumed
+    non-empty, which _SENT_RE.split guarantees for stripped text.
+    """
+    # ends[k]: joined length of sentences[:k] plus one trailing separator
+    ends = [0]
+    ends.extend(accumulate(len(sentence) + 1 for sentence in sentences))
+    chunks = []
+    start = 0
+    count = len(sentences)
+    while start < count:
+        # Sentence j fits iff ends[j + 1] - ends[start] - 2 <= limit
+        stop = max(bisect_right(ends, ends[start] + limit + 2) - 1, start + 1)
+        chunks.append(' '.join(sentences[start:stop]).strip())
+        start = stop
+    return chunks
+
+class Chunk:
+    """
+    One RAG retrieval chunk.
+    
+    Slotted rather than a dict: a run produces hundreds of these, and the
+    chunks of a subject share a single metadata dict. to_dict() gives the
+    exact record written to the optimized JSON file.
+    """
+    
+    __slots__ = ('chunk_id', 'title', 'type', 'content', 'metadata', 'rankings')
+    
+    def __init__(self, chunk_id, title, type, content, metadata, rankings=None):
+        self.chunk_id = chunk_id
+        self.title = title
+        self.type = type
+        self.content = content
+        self.metadata = metadata
+        self.rankings = rankings
+    
+    def to_dict(self):
+        """Return the chunk as a JSON-ready dict."""
+        record = {
+            'chunk_id': self.chunk_id,
+            'title': self.title,
+            'type': self.type,
+            'content': self.content
+        }
+        if self.rankings is not None:
+            record['rankings'] = self.rankings
+        record['metadata'] = dict(self.metadata)
+        return record
+
+def _json_default(obj):
+    """orjson fallback for the scraper's own record types."""
+    if isinstance(obj, Chunk):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class _TeeReader:
+    """File-like wrapper that copies everything read from a stream to a file."""
+    
+    def __init__(self, stream, copy):
+        self.stream = stream
+        self.copy = copy
+    
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.copy.write(data)
+        return data
+
 class LinkeduSubjectScraper:
     """Class to scrape subjects and their details from LinkedU.hk website."""
     
     def __init__(self, base_url="https://linkedu.hk", 
-                 subjects_url="https://linkedu.hk/popular-subjects/"):
+                 subjects_url="https://linkedu.hk/popular-subjects/",
+                 concurrency=10, cache_ttl=24 * 60 * 60):
         """Initialize the scraper with base URL and subjects page URL."""
         self.base_url = base_url
         self.subjects_url = subjects_url
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate, br',
         })
+        # Keep connections to linkedu.hk open across requests and retry
+        # rate limiting and transient server errors
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.subjects = []
+        # Maximum number of subject pages fetched at the same time
+        self.concurrency = concurrency
+        # Pages are cached on disk for this many seconds; None disables it.
+        # Expired copies are revalidated with conditional GETs
+        self.cache_ttl = cache_ttl
+        self._validators = None
+        self._validators_changed = False
         self.output_directory = Path(os.path.dirname(os.path.abspath(__file__)))
 
-    def get_soup(self, url):
-        """Get BeautifulSoup object from a URL."""
+    def _cache_path(self, url):
+        """Return the cache file for a URL."""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.output_directory / 'http_cache' / f"{key}.html.gz"
+
+    def _validators_path(self):
+        """Return the sidecar file holding each cached URL's ETag/Last-Modified."""
+        return self.output_directory / 'http_cache' / 'validators.json'
+
+    def _load_validators(self):
+        """Return the URL -> validators map, reading the sidecar file on first use."""
+        if self._validators is None:
+            try:
+                self._validators = orjson.loads(self._validators_path().read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                self._validators = {}
+        return self._validators
+
+    def _save_validators(self):
+        """Write the validators back to the sidecar file if any changed."""
+        if not self._validators_changed:
+            return
+        path = self._validators_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(orjson.dumps(self._validators))
+        os.replace(tmp_path, path)
+        self._validators_changed = False
+
+    def _remember_validators(self, url, headers):
+        """Record the validators a response came with for the next conditional GET."""
+        validators = {}
+        if headers.get('ETag'):
+            validators['etag'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['last_modified'] = headers['Last-Modified']
+        
+        known = self._load_validators()
+        if known.get(url) != validators:
+            if validators:
+                known[url] = validators
+            else:
+                known.pop(url, None)
+            self._validators_changed = True
+
+    def _conditional_headers(self, url):
+        """Return If-None-Match/If-Modified-Since headers for a URL we hold a copy of."""
+        if not self.cache_ttl or not self._cache_path(url).exists():
+            return {}
+        validators = self._load_validators().get(url, {})
+        headers = {}
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def _read_cache(self, url, max_age=None):
+        """
+        Return the cached body of a URL, or None if missing or expired.
+        
+        max_age defaults to cache_ttl; pass float('inf') to accept a copy of
+        any age, e.g. after the server answered 304 Not Modified.
+        """
+        if not self.cache_ttl:
+            return None
+        if max_age is None:
+            max_age = self.cache_ttl
+        path = self._cache_path(url)
+        try:
+            if time.time() - path.stat().st_mtime < max_age:
+                return gzip.decompress(path.read_bytes())
+        except (OSError, EOFError, zlib.error):
+            pass
+        return None
+
+    def _read_fresh(self, url):
+        """Return the cached body of a URL if it's within the cache TTL."""
+        body = self._read_cache(url)
+        if body is not None:
+            logger.info(f"Using cached copy of {url}")
+        return body
+
+    def _read_not_modified(self, url):
+        """Return the cached body after a 304 and restart its TTL."""
+        body = self._read_cache(url, max_age=float('inf'))
+        if body is not None:
+            logger.info(f"{url} not modified, using cached copy")
+            os.utime(self._cache_path(url))
+        return body
+
+    @contextmanager
+    def _cache_writer(self, url):
+        """Open a URL's gzipped cache file for writing; it only replaces the old one on success."""
+        path = self._cache_path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
         try:
-            response = self.session.get(url, timeout=30)
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+
+    @contextmanager
+    def open_page(self, url):
+        """
+        Open a URL as a binary stream, from the cache when it's fresh.
+        
+        A stale copy is revalidated with a conditional GET and reused on
+        304 Not Modified. Network bodies are read straight off the socket as
+        they arrive and, with caching enabled, copied into the cache as
+        they're read; the caller must read the stream to the end for that
+        copy to be complete.
+        """
+        cached = self._read_fresh(url)
+        if cached is not None:
+            yield io.BytesIO(cached)
+            return
+        
+        headers = self._conditional_headers(url)
+        with self.session.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304:
+                yield io.BytesIO(self._read_not_modified(url) or b'')
+                return
+            
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'lxml')
-        except requests.RequestException as e:
+            response.raw.decode_content = True
+            if not self.cache_ttl:
+                yield response.raw
+                return
+            
+            with self._cache_writer(url) as copy:
+                yield _TeeReader(response.raw, copy)
+            self._remember_validators(url, response.headers)
+
+    def get_tree(self, url):
+        """Get the parsed lxml tree of a URL."""
+        try:
+            with self.open_page(url) as page:
+                return lxml.html.parse(page, parser=_HTML_PARSER).getroot()
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    async def fetch(self, session, url):
+        """Fetch a page asynchronously and return its raw HTML bytes."""
+        cached = self._read_fresh(url)
+        if cached is not None:
+            return cached
+        
+        try:
+            async with session.get(url, headers=self._conditional_headers(url),
+                                   timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status == 304:
+                    return self._read_not_modified(url)
+                response.raise_for_status()
+                body = await response.read()
+            
+            if self.cache_ttl:
+                with self._cache_writer(url) as f:
+                    f.write(body)
+                self._remember_validators(url, response.headers)
+            return body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
 
     def extract_subjects_from_page(self):
         """Extract all subject links from the main subjects page."""
         logger.info(f"Fetching subjects from {self.subjects_url}")
-        soup = self.get_soup(self.subjects_url)
         
-        if not soup:
+        subjects_data = []
+        subject_list = None
+        in_list = False
+        try:
+            with self.open_page(self.subjects_url) as page:
+                # Walk the page as it's parsed and keep only the subject
+                # items; everything else is cleared as soon as it closes
+                for event, elem in etree.iterparse(page, events=('start', 'end'), tag=('div', 'li'),
+                                                   html=True, encoding='utf-8'):
+                    if event == 'start':
+                        if subject_list is None and _is_subject_list(elem):
+                            # Only the first matching container counts
+                            subject_list = elem
+                            in_list = True
+                        continue
+                    
+                    if elem is subject_list:
+                        in_list = False
+                    elif in_list:
+                        if elem.tag != 'li' or not _has_class(elem, 'subject__menu-item'):
+                            continue
+                        subject = _parse_subject_item(elem)
+                        if subject:
+                            subjects_data.append(subject)
+                    
+                    # Free the finished subtree and the empty siblings before it
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            logger.error(f"Error fetching {self.subjects_url}: {e}")
+            logger.error("Failed to fetch subjects page")
+            return []
+        except etree.XMLSyntaxError:
+            # Raised for an empty body
             logger.error("Failed to fetch subjects page")
             return []
-            
-        # Find the dynamic list containing all subject items
-        subject_list = soup.select_one('div#_dynamic_list-39-29463.oxy-dynamic-list')
         
-        if not subject_list:
+        if subject_list is None:
             logger.error("Subject list container not found")
             return []
-            
-        subject_items = subject_list.select('li.subject__menu-item')
-        
-        subjects_data = []
-        for item in subject_items:
-            link_element = item.select_one('a.ct-link')
-            if not link_element:
-                continue
-                
-            url = link_element.get('href', '')
-            
-            # Get Chinese name
-            chinese_name_elem = link_element.select_one('h3.ct-headline span.ct-span')
-            chinese_name = chinese_name_elem.text if chinese_name_elem else ''
-            
-            # Get English name
-            english_name_elem = link_element.select_one('h4.ct-headline span.ct-span')
-            english_name = english_name_elem.text if english_name_elem else ''
-            
-            if url and english_name:
-                subjects_data.append({
-                    'url': url,
-                    'chinese_name': chinese_name,
-                    'english_name': english_name
-                })
                 
         logger.info(f"Found {len(subjects_data)} subjects")
         return subjects_data
 
-    def extract_article_content(self, url, subject_data):
-        """Extract article content from a subject page."""
-        logger.info(f"Extracting content from {url}")
-        soup = self.get_soup(url)
-        
-        if not soup:
-            logger.error(f"Failed to fetch article at {url}")
-            return None
-            
-        # Extract article metadata and content
-        article = soup.select_one('article.ct-div-block.subject-content')
-        if not article:
-            logger.error(f"Article content not found at {url}")
-            return None
-        
-        # Extract last updated date
-        updated_date_elem = article.select_one('.oxy-post-modified-date')
-        updated_date_text = updated_date_elem.get_text(strip=True) if updated_date_elem else ''
-        last_updated = ''
-        
-        if updated_date_text:
-            # Extract date from text like "最後更新於 2024年10月10日"
-            date_match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日', updated_date_text)
-            if date_match:
-                year, month, day = date_match.groups()
-                last_updated = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-        
-        # Extract author info
-        author_name_elem = article.select_one('.post__author-name span.ct-span')
-        author_name = author_name_elem.get_text(strip=True) if author_name_elem else ''
-        
-        author_title_elem = article.select_one('.post__author-title span.ct-span')
-        author_title = author_title_elem.get_text(strip=True) if author_title_elem else ''
-        
-        # Extract main content
-        content_elem = article.select_one('.post-content .ct-span')
-        content = ''
-        if content_elem:
-            # Extract all text content while preserving structure
-            for elem in content_elem.descendants:
-                if elem.name is None and elem.strip():  # Text node
-                    content += elem.strip() + ' '
-                elif elem.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                    heading_text = elem.get_text(strip=True)
-                    content += f" {heading_text}. "
-                elif elem.name == 'li':
-                    item_text = elem.get_text(strip=True)
-                    content += f" • {item_text}. "
-                elif elem.name == 'p':
-                    para_text = elem.get_text(strip=True)
-                    if para_text:
-                        content += f"{para_text} "
-        
-        # Extract skills section
-        skills_elem = article.select_one('.subject__skill.info-wrap')
-        skills_text = ''
-        if skills_elem:
-            skills_text = skills_elem.get_text(strip=True)
-        
-        # Extract requirements sections
-        requirements = []
-        for req_elem in article.select('.subject-requirement'):
-            title_elem = req_elem.select_one('.tf-title')
-            content_elem = req_elem.select_one('.info-wrap')
-            
-            if title_elem and content_elem:
-                req_title = title_elem.get_text(strip=True)
-                req_content = content_elem.get_text(strip=True)
-                requirements.append({
-                    'title': req_title,
-                    'content': req_content
-                })
+    def extract_article_content(self, url, subject_data, html):
+        """Extract article content from the fetched HTML of a subject page."""
+        return _parse_subject_page(html, url, subject_data)
+    
+    async def _scrape_async(self, subjects_list):
+        """
+        Fetch all subject pages concurrently and extract their content.
+        Pages are parsed in worker processes as soon as they arrive, so
+        parsing overlaps with the downloads still in flight.
+        """
+        # Be nice to the server - cap the number of requests in flight
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        loop = asyncio.get_running_loop()
         
-        # Get recommended schools if available
-        recommended_schools = []
-        schools_section = soup.select_one('#recommendation')
-        if schools_section:
-            for school_card in schools_section.select('.school-card__wrap'):
-                school_name_elem = school_card.select_one('.school-card__title a')
-                school_desc_elem = school_card.select_one('.school-card__excerpt')
-                
-                if school_name_elem:
-                    school_name = school_name_elem.get_text(strip=True)
-                    school_url = school_name_elem.get('href', '')
-                    school_desc = school_desc_elem.get_text(strip=True) if school_desc_elem else ''
+        with ProcessPoolExecutor() as executor:
+            async with aiohttp.ClientSession(headers=dict(self.session.headers), connector=connector) as session:
+                async def fetch_and_parse(i, subject):
+                    async with semaphore:
+                        logger.info(f"Processing subject {i+1}/{len(subjects_list)}: {subject['english_name']}")
+                        html = await self.fetch(session, subject['url'])
                     
-                    recommended_schools.append({
-                        'name': school_name,
-                        'url': school_url,
-                        'description': school_desc
-                    })
-        
-        # Get rankings if available
-        rankings = []
-        rankings_section = soup.select_one('#rankings')
-        if rankings_section:
-            for rank_row in rankings_section.select('.school-ranking__wrap'):
-                rank_cells = rank_row.select('td')
-                if len(rank_cells) >= 2:
-                    rank_num = rank_cells[0].get_text(strip=True)
-                    school_elem = rank_cells[1].select_one('a')
-                    if school_elem:
-                        school_name = school_elem.get_text(strip=True)
-                        school_url = school_elem.get('href', '')
-                        rankings.append({
-                            'rank': rank_num,
-                            'school': school_name,
-                            'url': school_url
-                        })
-        
-        # Compile subject data
-        subject_data.update({
-            'url': url,
-            'last_updated': last_updated,
-            'author': {
-                'name': author_name,
-                'title': author_title
-            },
-            'content': content.strip(),
-            'skills_info': skills_text,
-            'requirements': requirements,
-            'recommended_schools': recommended_schools,
-            'rankings': rankings,
-        })
-        
-        return subject_data
-    
-    def scrape_all_subjects(self):
-        """Scrape all subjects and their content."""
-        subjects_list = self.extract_subjects_from_page()
+                    if not html:
+                        logger.error(f"Failed to fetch article at {subject['url']}")
+                        return None
+                    
+                    return await loop.run_in_executor(
+                        executor, _parse_subject_page, html, subject['url'], subject.copy()
+                    )
+                
+                results = await asyncio.gather(
+                    *[fetch_and_parse(i, subject) for i, subject in enumerate(subjects_list)],
+                    return_exceptions=True
+                )
         
         all_subject_data = []
-        for i, subject in enumerate(subjects_list):
-            logger.info(f"Processing subject {i+1}/{len(subjects_list)}: {subject['english_name']}")
-            subject_data = self.extract_article_content(subject['url'], subject.copy())
+        for subject, subject_data in zip(subjects_list, results):
+            if isinstance(subject_data, Exception):
+                logger.error(f"Error processing {subject['url']}: {subject_data}")
+                continue
             
             if subject_data:
                 all_subject_data.append(subject_data)
-                
-            # Be nice to the server - add a short delay between requests
-            if i < len(subjects_list) - 1:
-                time.sleep(1)
         
         return all_subject_data
+    
+    def scrape_all_subjects(self):
+        """Scrape all subjects and their content."""
+        try:
+            subjects_list = self.extract_subjects_from_page()
+            return asyncio.run(self._scrape_async(subjects_list))
+        finally:
+            self._save_validators()
 
-    def clean_text(self, text):
-        """Clean text by removing unnecessary whitespace and newlines."""
-        if not text:
-            return ""
-            
-        # Replace multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text)
-        # Remove unnecessary whitespace
-        text = text.strip()
-        # Replace multiple line breaks with single space
-        text = re.sub(r'\n+', ' ', text)
-        return text
+    # Kept as a method for existing callers
+    clean_text = staticmethod(clean_text)
 
     def optimize_for_rag(self, subjects_data):
-        """Optimize the subjects data for RAG retrieval."""
-        optimized_data = []
+        """Optimize the subjects data for RAG retrieval, as a list of chunk dicts."""
+        return [chunk.to_dict() for chunk in self.iter_rag_chunks(subjects_data)]
+
+    def iter_rag_chunks(self, subjects_data):
+        """
+        Yield RAG chunks subject by subject.
         
+        Each chunk is handed out as soon as it's built, so this can feed
+        stream_to_json directly without building the full list.
+        """
         for subject in subjects_data:
-            # Create chunks with different sections of content
-            chunks = []
+            # Prefix shared by every chunk id of this subject
+            slug = subject['english_name'].lower().replace(' ', '_')
+            # Every chunk of a subject carries the same metadata
+            metadata = {
+                'subject': subject['english_name'],
+                'chinese_name': subject['chinese_name'],
+                'url': subject['url'],
+                'last_updated': subject['last_updated']
+            }
             
             # Basic info chunk
-            basic_info = {
-                'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_basic",
-                'title': f"{subject['english_name']} ({subject['chinese_name']})",
-                'type': 'basic_info',
-                'content': self.clean_text(f"Subject: {subject['english_name']} ({subject['chinese_name']}). Last updated: {subject['last_updated']}. Author: {subject['author']['name']}, {subject['author']['title']}")
-            }
-            chunks.append(basic_info)
+            yield Chunk(
+                f"{slug}_basic",
+                f"{subject['english_name']} ({subject['chinese_name']})",
+                'basic_info',
+                clean_text(f"Subject: {subject['english_name']} ({subject['chinese_name']}). Last updated: {subject['last_updated']}. Author: {subject['author']['name']}, {subject['author']['title']}"),
+                metadata
+            )
             
             # Skills and requirements chunk
             if subject['skills_info']:
-                skills = {
-                    'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_skills",
-                    'title': f"{subject['english_name']} - Skills and Requirements",
-                    'type': 'skills_info',
-                    'content': self.clean_text(subject['skills_info'])
-                }
-                chunks.append(skills)
+                yield Chunk(
+                    f"{slug}_skills",
+                    f"{subject['english_name']} - Skills and Requirements",
+                    'skills_info',
+                    clean_text(subject['skills_info']),
+                    metadata
+                )
             
             # Academic requirements chunks
             for req in subject['requirements']:
-                req_chunk = {
-                    'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_{req['title'].lower().replace(' ', '_').replace('（', '').replace('）', '')}",
-                    'title': req['title'],
-                    'type': 'requirement',
-                    'content': self.clean_text(req['content'])
-                }
-                chunks.append(req_chunk)
+                yield Chunk(
+                    f"{slug}_{req['title'].lower().translate(_REQUIREMENT_SLUG_TABLE)}",
+                    req['title'],
+                    'requirement',
+                    clean_text(req['content']),
+                    metadata
+                )
             
             # Main content - split into reasonable chunks
             if subject['content']:
                 # Simple chunking by paragraphs but clean text first
-                clean_content = self.clean_text(subject['content'])
+                clean_content = clean_text(subject['content'])
                 # Split into sentences for more granular chunking
-                sentences = re.split(r'(?<=[.!?])\s+', clean_content)
+                sentences = _SENT_RE.split(clean_content) if clean_content else []
                 
-                current_chunk = ""
-                chunk_count = 0
-                
-                for sentence in sentences:
-                    # If adding this sentence would make the chunk too large, save current chunk
-                    if len(current_chunk) + len(sentence) > 1000 and current_chunk:
-                        chunk_count += 1
-                        content_chunk = {
-                            'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_content_{chunk_count}",
-                            'title': f"{subject['english_name']} - Content Part {chunk_count}",
-                            'type': 'content',
-                            'content': current_chunk.strip()
-                        }
-                        chunks.append(content_chunk)
-                        current_chunk = sentence
-                    else:
-                        if current_chunk:
-                            current_chunk += " " + sentence
-                        else:
-                            current_chunk = sentence
-                
-                # Save the last chunk if there's anything left
-                if current_chunk:
-                    chunk_count += 1
-                    content_chunk = {
-                        'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_content_{chunk_count}",
-                        'title': f"{subject['english_name']} - Content Part {chunk_count}",
-                        'type': 'content',
-                        'content': current_chunk.strip()
-                    }
-                    chunks.append(content_chunk)
+                for chunk_count, text in enumerate(_pack_sentences(sentences, 1000), 1):
+                    yield Chunk(
+                        f"{slug}_content_{chunk_count}",
+                        f"{subject['english_name']} - Content Part {chunk_count}",
+                        'content',
+                        text,
+                        metadata
+                    )
             
             # Recommended schools chunk
             if subject['recommended_schools']:
-                schools_text = "Recommended schools: "
-                for school in subject['recommended_schools']:
-                    schools_text += f"{school['name']}: {self.clean_text(school['description'])}. "
+                schools_text = "Recommended schools: " + ' '.join(
+                    f"{school['name']}: {clean_text(school['description'])}."
+                    for school in subject['recommended_schools']
+                )
                 
-                schools_chunk = {
-                    'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_recommended_schools",
-                    'title': f"{subject['english_name']} - Recommended Schools",
-                    'type': 'recommended_schools',
-                    'content': schools_text.strip()
-                }
-                chunks.append(schools_chunk)
+                yield Chunk(
+                    f"{slug}_recommended_schools",
+                    f"{subject['english_name']} - Recommended Schools",
+                    'recommended_schools',
+                    schools_text.strip(),
+                    metadata
+                )
             
             # Rankings chunk
             if subject['rankings']:
@@ -358,43 +789,52 @@ class LinkeduSubjectScraper:
                     })
                 
                 # Also create a text version for content
-                rankings_text = "Subject rankings: "
-                for rank in subject['rankings']:
-                    rankings_text += f"#{rank['rank']}: {rank['school']}. "
+                rankings_text = "Subject rankings: " + ' '.join(
+                    f"#{rank['rank']}: {rank['school']}." for rank in subject['rankings']
+                )
                 
-                rankings_chunk = {
-                    'chunk_id': f"{subject['english_name'].lower().replace(' ', '_')}_rankings",
-                    'title': f"{subject['english_name']} - University Rankings",
-                    'type': 'rankings',
-                    'content': rankings_text.strip(),
-                    'rankings': rankings_list  # Include structured rankings data
-                }
-                chunks.append(rankings_chunk)
-            
-            # Add metadata to all chunks
-            for chunk in chunks:
-                chunk.update({
-                    'metadata': {
-                        'subject': subject['english_name'],
-                        'chinese_name': subject['chinese_name'],
-                        'url': subject['url'],
-                        'last_updated': subject['last_updated']
-                    }
-                })
-            
-            optimized_data.extend(chunks)
-        
-        return optimized_data
+                yield Chunk(
+                    f"{slug}_rankings",
+                    f"{subject['english_name']} - University Rankings",
+                    'rankings',
+                    rankings_text.strip(),
+                    metadata,
+                    rankings=rankings_list  # Include structured rankings data
+                )
 
     def save_to_json(self, data, filename):
         """Save data to a JSON file."""
         filepath = self.output_directory / filename
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, default=_json_default, option=JSON_OPTIONS))
         
         logger.info(f"Data saved to {filepath}")
         return str(filepath)
 
+    def stream_to_json(self, items, filename):
+        """
+        Write an iterable of records to a JSON array one element at a time.
+        
+        The output is byte-identical to save_to_json(list(items)), but only
+        one serialized record is held in memory at once.
+        """
+        filepath = self.output_directory / filename
+        count = 0
+        with open(filepath, 'wb') as f:
+            f.write(b'[')
+            for item in items:
+                if count:
+                    f.write(b',')
+                # JSON strings never contain raw newlines, so re-indenting the
+                # element one level is a plain byte replace
+                f.write(b'\n  ')
+                f.write(orjson.dumps(item, default=_json_default, option=JSON_OPTIONS).replace(b'\n', b'\n  '))
+                count += 1
+            f.write(b'\n]' if count else b']')
+        
+        logger.info(f"Saved {count} records to {filepath}")
+        return str(filepath)
+
     def run(self):
         """Run the complete scraping process."""
         try:
@@ -404,11 +844,11 @@ class LinkeduSubjectScraper:
             # Save raw data
             raw_filepath = self.save_to_json(subjects_data, 'linkedu_subjects.json')
             
-            # Create optimized version for RAG
-            optimized_data = self.optimize_for_rag(subjects_data)
-            
-            # Save optimized data
-            optimized_filepath = self.save_to_json(optimized_data, 'linkedu_subjects_rag_optimized.json')
+            # Create the RAG-optimized version and write it as it's produced
+            optimized_filepath = self.stream_to_json(
+                self.iter_rag_chunks(subjects_data),
+                'linkedu_subjects_rag_optimized.json'
+            )
             
             return {
                 'raw_data': raw_filepath,
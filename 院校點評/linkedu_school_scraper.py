@@ -4,24 +4,353 @@ LinkedU School Scraper
 Scrapes school information from https://linkedu.hk/school-rank/ pages and formats them for RAG
 """
 
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from cssselect import HTMLTranslator
+import orjson
+import gzip
+import zlib
+import hashlib
 import time
 import re
 import os
 import random
+from itertools import islice
 from urllib.parse import urljoin
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Patterns and word lists used for every school are built once here
+_WORD_RE = re.compile(r'\b\w{4,}\b')
+_HEADING_RE = re.compile(r'#+\s+(.+?)\s')
+_STOPWORDS = frozenset({'school', 'university', 'college', 'campus', 'student', 'students', 'education'})
+
+# orjson with these options writes the same bytes as
+# json.dump(indent=2, ensure_ascii=False)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# LinkedU serves UTF-8; without this libxml2 falls back to Latin-1 for
+# pages that don't declare a charset
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Text nodes as BeautifulSoup's .text sees them: comments, script/style
+# contents and anything inside a <template> don't count, except when .text
+# is called on the script, style or template element itself
+_TEXT_NODES = etree.XPath('.//text()[not(parent::script or parent::style or ancestor::template)]')
+_TEMPLATE_TEXT_NODES = etree.XPath('.//text()[not(parent::script or parent::style)]')
+_OWN_TEXT_NODES = etree.XPath('text()')
+
+# Whitespace BeautifulSoup collapses in strings outside <pre>/<textarea>
+_ASCII_SPACES = ' \n\t\x0c\r'
+
+def _descendant_selector(selector: str) -> etree.XPath:
+    """
+    Compile a CSS selector that only matches descendants of the context element
+    """
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix='descendant::'))
+
+# School page selectors are compiled to XPath once here rather than on
+# every page
+_SEL_NAMES = [
+    CSSSelector(selector, translator='html')
+    for selector in (
+        'h1',
+        'h1.entry-title',
+        'span#span-178-5961',  # From example HTML
+        '.school-content__subtitle span'
+    )
+]
+_SEL_SUBJECTS_SECTION = CSSSelector('.school-content__detail', translator='html')
+_SEL_ACCORDION_ITEM = CSSSelector('.oxy-pro-accordion_item', translator='html')
+_SEL_POST_CONTENT = CSSSelector('.post-content', translator='html')
+_SEL_SCHOOL_CONTENT = CSSSelector('.school-content', translator='html')
+_SEL_ADDRESS = CSSSelector('.school-card__address', translator='html')
+_SEL_WEBSITE = CSSSelector('a[href*="http"]:not([href*="linkedu.hk"])', translator='html')
+
+# Lookups inside an element already found. CSSSelector also matches the
+# element it's called on, which BeautifulSoup's find()/select_one() don't
+_SEL_H2 = _descendant_selector('h2')
+_SEL_TEXT_BLOCK = _descendant_selector('div.ct-text-block')
+_SEL_CT_SPAN = _descendant_selector('span.ct-span')
+_SEL_ACCORDION_TITLE = _descendant_selector('.oxy-pro-accordion_title')
+_SEL_ACCORDION_CONTENT = _descendant_selector('.oxy-pro-accordion_content')
+
+# School ranking (listing) page selectors
+_SEL_SCHOOLS_GRID = CSSSelector('div#schools-grid', translator='html')
+_SEL_SCHOOL_CARD = _descendant_selector('div.school-card__wrap')
+_SEL_CARD_TITLE_WRAP = _descendant_selector('div.school-card__title-wrap')
+_SEL_CARD_ADDRESS = _descendant_selector('h3.school-card__address')
+_SEL_CARD_EXCERPT = _descendant_selector('div.school-card__excerpt')
+_SEL_LINK = _descendant_selector('a')
+
+# Common country indicators in addresses, checked in this order
+_COUNTRY_INDICATORS = {
+    "UK": ["UK", "United Kingdom", "England", "Scotland", "Wales", "Northern Ireland"],
+    "US": ["US", "USA", "United States", "America"],
+    "CA": ["Canada", "CA"],
+    "AU": ["Australia", "AU"],
+    "CN": ["China", "CN", "Hong Kong", "Macau"]
+}
+# Upper-cased indicator -> (priority, country code)
+_INDICATOR_COUNTRY = {
+    indicator.upper(): (priority, code)
+    for priority, (code, indicators) in enumerate(_COUNTRY_INDICATORS.items())
+    for indicator in indicators
+}
+# The lookahead reports a match at every position, overlapping ones
+# included, and alternatives in priority order make each position report
+# its highest-priority indicator
+_COUNTRY_RE = re.compile('(?=(' + '|'.join(map(re.escape, _INDICATOR_COUNTRY)) + '))')
+
+def _parse_html(content: bytes) -> lxml.html.HtmlElement:
+    """
+    Parse HTML bytes into an lxml element tree
+    """
+    return lxml.html.document_fromstring(content, parser=_HTML_PARSER)
+
+def _parse_until_grid(chunks: Iterable[bytes]) -> Tuple[etree._Element, bytes]:
+    """
+    Parse a listing page from a stream of chunks, stopping as soon as the
+    first schools grid is closed
+    
+    Returns the tree and the bytes read. Everything the grid holds is
+    complete by then, so the rest of the page isn't needed
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag='div', encoding='utf-8')
+    received = bytearray()
+    grid = None
+    for chunk in chunks:
+        received += chunk
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if grid is None and elem.get('id') == 'schools-grid':
+                    grid = elem
+            elif elem is grid:
+                return parser.close(), bytes(received)
+    return parser.close(), bytes(received)
+
+def _select_one(elem, selector: etree.XPath):
+    """
+    Return the first element matching a compiled selector, or None
+    """
+    matches = selector(elem)
+    return matches[0] if matches else None
+
+def _text_nodes(elem) -> List[str]:
+    """
+    The strings BeautifulSoup's .text and .stripped_strings use for an element
+    """
+    if elem.tag == 'template':
+        return _TEMPLATE_TEXT_NODES(elem)
+    if elem.tag in ('script', 'style'):
+        return _OWN_TEXT_NODES(elem)
+    return _TEXT_NODES(elem)
+
+def _is_preformatted(text) -> bool:
+    """
+    Whether a text node returned by XPath lies inside <pre> or <textarea>
+    """
+    parent = text.getparent()
+    if text.is_tail:
+        parent = parent.getparent()
+    while parent is not None:
+        if parent.tag in ('pre', 'textarea'):
+            return True
+        parent = parent.getparent()
+    return False
+
+def _bs4_string(text) -> str:
+    """
+    A text node as BeautifulSoup stores it: nothing but ASCII whitespace
+    becomes a single newline or space, outside <pre> and <textarea>
+    """
+    if text.strip(_ASCII_SPACES) or _is_preformatted(text):
+        return text
+    return '\n' if '\n' in text else ' '
+
+def _get_text(elem) -> str:
+    """
+    Text of an element as BeautifulSoup's .text returns it
+    """
+    return ''.join(map(_bs4_string, _text_nodes(elem)))
+
+def _parse_school_html(html_bytes: bytes, school_url: str) -> Dict:
+    """
+    Extract the school details from a downloaded school page
+    
+    Module-level so it can run in a worker process
+    """
+    tree = _parse_html(html_bytes)
+    
+    # Basic school info
+    school_name = ""
+    
+    # Find the school name
+    for selector in _SEL_NAMES:
+        name_elem = _select_one(tree, selector)
+        if name_elem is not None and _get_text(name_elem).strip():
+            school_name = _get_text(name_elem).strip()
+            break
+    
+    # Extract popular subjects/features
+    popular_subjects = []
+    subjects_section = _select_one(tree, _SEL_SUBJECTS_SECTION)
+    if subjects_section is not None:
+        subjects_heading = _select_one(subjects_section, _SEL_H2)
+        if subjects_heading is not None and "熱門科目" in _get_text(subjects_heading):
+            subjects_elem = _select_one(subjects_section, _SEL_TEXT_BLOCK)
+            if subjects_elem is not None:
+                subjects_span = _select_one(subjects_elem, _SEL_CT_SPAN)
+                if subjects_span is not None:
+                    # Split by <br> tags
+                    for line in _text_nodes(subjects_span):
+                        subject = line.strip()
+                        if subject:
+                            popular_subjects.append(subject)
+    
+    # Extract course information
+    courses = []
+    for item in _SEL_ACCORDION_ITEM(tree):
+        course_title = ""
+        course_content = ""
+        
+        title_elem = _select_one(item, _SEL_ACCORDION_TITLE)
+        if title_elem is not None:
+            course_title = _get_text(title_elem).strip()
+        
+        content_elem = _select_one(item, _SEL_ACCORDION_CONTENT)
+        if content_elem is not None:
+            course_content = _get_text(content_elem).strip()
+        
+        # Keep both title and content for better RAG retrieval
+        if course_title:
+            courses.append({
+                'title': course_title,
+                'content': course_content
+            })
+    
+    # Extract main content
+    content = ""
+    content_elem = _select_one(tree, _SEL_POST_CONTENT)
+    if content_elem is None:
+        content_elem = _select_one(tree, _SEL_SCHOOL_CONTENT)
+    
+    if content_elem is not None:
+        content = _clean_content(content_elem)
+    
+    # Extract school address if not already found
+    address = ""
+    address_elem = _select_one(tree, _SEL_ADDRESS)
+    if address_elem is not None:
+        address = _get_text(address_elem).strip()
+    
+    # Extract school website if available
+    website = ""
+    website_elem = _select_one(tree, _SEL_WEBSITE)
+    if website_elem is not None:
+        website = website_elem.get('href', '')
+    
+    # Compile the minimal school information needed for RAG
+    school_info = {
+        'name': school_name,
+        'url': school_url,
+        'address': address,
+        'popular_subjects': popular_subjects,
+        'courses': courses,
+        'content': content,
+        'website': website
+    }
+    
+    return school_info
+
+def _clean_content(content_elem) -> str:
+    """
+    Clean and format school content for RAG
+    """
+    # Remove unwanted elements. Each one is swapped for an empty comment
+    # holding its tail, so the text on either side stays two separate
+    # strings as it did with BeautifulSoup's decompose()
+    for elem in list(content_elem.iterdescendants('script', 'style', 'nav', 'footer', 'aside', 'iframe')):
+        placeholder = etree.Comment()
+        placeholder.tail = elem.tail
+        elem.getparent().replace(elem, placeholder)
+    
+    # With no <template> around, every string left in the content counts,
+    # and lxml's C-level itertext() collects them faster than the XPath
+    # query that has to rule out template text
+    if next(content_elem.iter('template'), None) is None and next(content_elem.iterancestors('template'), None) is None:
+        strings = etree._Element.itertext
+    else:
+        strings = _TEXT_NODES
+    
+    # Extract text while preserving structure
+    content_parts = []
+    
+    # Process headings and paragraphs
+    for elem in content_elem.iterdescendants('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'):
+        text = ''.join(t.strip() for t in strings(elem))
+        if not text:
+            continue
+            
+        # Format based on element type
+        if elem.tag.startswith('h'):
+            level = int(elem.tag[1])
+            prefix = '#' * level
+            # Use spaces instead of newlines for better JSON formatting
+            content_parts.append(f"{prefix} {text}")
+        elif elem.tag == 'li':
+            content_parts.append(f"• {text}")
+        else:
+            content_parts.append(text)
+    
+    # Join with spaces instead of newlines
+    return ' '.join(content_parts)
+
+class SchoolRecord:
+    """
+    A school as scraped, before RAG optimization
+    
+    Slotted rather than a dict, since a full run holds thousands of these.
+    to_dict() gives the plain record
+    """
+    
+    __slots__ = ('id', 'name', 'url', 'country', 'description',
+                 'content', 'popular_subjects', 'courses', 'website')
+    
+    def __init__(self, id: str, name: str, url: str, country: str, description: str,
+                 content: str = '', popular_subjects: Optional[List[str]] = None,
+                 courses: Optional[List[Dict]] = None, website: str = ''):
+        self.id = id
+        self.name = name
+        self.url = url
+        self.country = country
+        self.description = description
+        self.content = content
+        self.popular_subjects = popular_subjects if popular_subjects is not None else []
+        self.courses = courses if courses is not None else []
+        self.website = website
+    
+    def to_dict(self) -> Dict:
+        """
+        Return the school as a JSON-ready dict
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
 class LinkedUSchoolScraper:
-    def __init__(self):
+    def __init__(self, concurrency: int = 10, cache_ttl: Optional[int] = 24 * 60 * 60):
         self.base_url = "https://linkedu.hk"
         self.schools_url = "https://linkedu.hk/school-rank/"
         self.session = requests.Session()
@@ -33,7 +362,24 @@ class LinkedUSchoolScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        # linkedu.hk is the only host, so one pool of kept-alive connections
+        # sized for the crawl; retry rate limiting and transient server errors
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.schools_data = []
+        # Maximum number of school pages fetched at the same time
+        self.concurrency = concurrency
+        # Pages are cached on disk for this many seconds; None disables it.
+        # Expired copies are revalidated with conditional GETs
+        self.cache_ttl = cache_ttl
+        self.cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+        self._validators = None
+        self._validators_changed = False
         # Define common keywords for better RAG content matching
         self.education_keywords = {
             'UK': ['united kingdom', 'england', 'london', 'british', 'scotland', 'wales'],
@@ -43,6 +389,174 @@ class LinkedUSchoolScraper:
             'CN': ['china', 'hong kong', 'macau', 'beijing', 'shanghai']
         }
     
+    def _cache_path(self, url: str) -> str:
+        """
+        Return the cache file for a URL
+        """
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.html.gz")
+    
+    def _validators_path(self) -> str:
+        """
+        Return the sidecar file holding each cached URL's ETag/Last-Modified
+        """
+        return os.path.join(self.cache_dir, 'validators.json')
+    
+    def _load_validators(self) -> Dict[str, Dict[str, str]]:
+        """
+        Return the URL -> validators map, reading the sidecar file on first use
+        """
+        if self._validators is None:
+            try:
+                with open(self._validators_path(), 'rb') as f:
+                    self._validators = orjson.loads(f.read())
+            except (OSError, orjson.JSONDecodeError):
+                self._validators = {}
+        return self._validators
+    
+    def _save_validators(self):
+        """
+        Write the validators back to the sidecar file if any changed
+        """
+        if not self._validators_changed:
+            return
+        path = self._validators_path()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(self._validators))
+        os.replace(tmp_path, path)
+        self._validators_changed = False
+    
+    def _remember_validators(self, url: str, headers) -> None:
+        """
+        Record the validators a response came with for the next conditional GET
+        """
+        validators = {}
+        if headers.get('ETag'):
+            validators['etag'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['last_modified'] = headers['Last-Modified']
+        
+        known = self._load_validators()
+        if known.get(url) != validators:
+            if validators:
+                known[url] = validators
+            else:
+                known.pop(url, None)
+            self._validators_changed = True
+    
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Return If-None-Match/If-Modified-Since headers for a URL we hold a copy of
+        """
+        if not self.cache_ttl or not os.path.exists(self._cache_path(url)):
+            return {}
+        validators = self._load_validators().get(url, {})
+        headers = {}
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    def _read_cache(self, url: str, max_age: Optional[float] = None) -> Optional[bytes]:
+        """
+        Return the cached body of a URL, or None if missing or expired
+        
+        max_age defaults to cache_ttl; pass float('inf') to accept a copy of
+        any age, e.g. after the server answered 304 Not Modified
+        """
+        if not self.cache_ttl:
+            return None
+        if max_age is None:
+            max_age = self.cache_ttl
+        path = self._cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) < max_age:
+                with gzip.open(path, 'rb') as f:
+                    return f.read()
+        except (OSError, EOFError, zlib.error):
+            pass
+        return None
+    
+    def _read_fresh(self, url: str) -> Optional[bytes]:
+        """
+        Return the cached body of a URL if it's within the cache TTL
+        """
+        body = self._read_cache(url)
+        if body is not None:
+            logger.info(f"Using cached copy of {url}")
+        return body
+    
+    def _read_not_modified(self, url: str) -> bytes:
+        """
+        Return the cached body after a 304 and restart its TTL
+        """
+        body = self._read_cache(url, max_age=float('inf'))
+        if body is None:
+            return b''
+        logger.info(f"{url} not modified, using cached copy")
+        os.utime(self._cache_path(url))
+        return body
+    
+    def _write_cache(self, url: str, body: bytes, headers) -> None:
+        """
+        Store a downloaded body gzipped along with its validators
+        """
+        if not self.cache_ttl:
+            return
+        path = self._cache_path(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write next to the old copy and swap, so a crash never leaves a
+        # truncated page behind
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        self._remember_validators(url, headers)
+    
+    def _get_listing_tree(self, url: str) -> etree._Element:
+        """
+        Get the parsed tree of a listing page, from the cache when it's fresh
+        
+        Downloads stop once the schools grid has been read; the page is
+        parsed as it arrives and only that much of it is cached
+        """
+        body = self._read_fresh(url)
+        if body is not None:
+            return _parse_html(body)
+        
+        # Add a small delay to avoid overwhelming the server
+        time.sleep(random.uniform(1, 3))
+        with self.session.get(url, headers=self._conditional_headers(url), timeout=30, stream=True) as response:
+            if response.status_code == 304:
+                return _parse_html(self._read_not_modified(url))
+            response.raise_for_status()
+            tree, body = _parse_until_grid(response.iter_content(64 * 1024))
+        
+        self._write_cache(url, body, response.headers)
+        return tree
+    
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """
+        Get the body of a school page, from the cache when it's fresh
+        """
+        body = self._read_fresh(url)
+        if body is not None:
+            return body
+        
+        # Be polite - keep the randomized delay before each real request
+        await asyncio.sleep(random.uniform(2, 4))
+        async with session.get(url, headers=self._conditional_headers(url),
+                               timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status == 304:
+                return self._read_not_modified(url)
+            response.raise_for_status()
+            body = await response.read()
+        self._write_cache(url, body, response.headers)
+        return body
+    
     def get_school_urls(self, max_pages: int = 10) -> List[Dict[str, str]]:
         """
         Extract school URLs from the school ranking pages
@@ -56,20 +570,17 @@ class LinkedUSchoolScraper:
                 url = f"{self.schools_url}?_pager={page}"
                 
                 logger.info(f"Scraping page {page}: {url}")
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
+                tree = self._get_listing_tree(url)
                 
                 # Find the schools grid container
-                schools_grid = soup.find('div', id='schools-grid')
+                schools_grid = _select_one(tree, _SEL_SCHOOLS_GRID)
                 
-                if not schools_grid:
+                if schools_grid is None:
                     logger.warning(f"No schools grid found on page {page}")
                     continue
                 
                 # Find all school cards
-                school_cards = schools_grid.find_all('div', class_='school-card__wrap')
+                school_cards = _SEL_SCHOOL_CARD(schools_grid)
                 
                 if not school_cards:
                     logger.warning(f"No school cards found on page {page}")
@@ -78,41 +589,41 @@ class LinkedUSchoolScraper:
                 page_schools = 0
                 for card in school_cards:
                     # Find the school title and link
-                    title_wrap = card.find('div', class_='school-card__title-wrap')
+                    title_wrap = _select_one(card, _SEL_CARD_TITLE_WRAP)
                     
-                    if not title_wrap:
+                    if title_wrap is None:
                         continue
                     
-                    title_span = title_wrap.find('span', class_='ct-span')
+                    title_span = _select_one(title_wrap, _SEL_CT_SPAN)
                     
-                    if not title_span:
+                    if title_span is None:
                         continue
                     
-                    link = title_span.find('a')
+                    link = _select_one(title_span, _SEL_LINK)
                     
-                    if not link or not link.get('href'):
+                    if link is None or not link.get('href'):
                         continue
                     
                     school_url = link.get('href')
-                    school_name = link.text.strip()
+                    school_name = _get_text(link).strip()
                     
                     # Get school address if available
                     address = ""
-                    address_elem = card.find('h3', class_='school-card__address')
-                    if address_elem:
-                        address_span = address_elem.find('span', class_='ct-span')
-                        if address_span:
-                            address = address_span.text.strip()
+                    address_elem = _select_one(card, _SEL_CARD_ADDRESS)
+                    if address_elem is not None:
+                        address_span = _select_one(address_elem, _SEL_CT_SPAN)
+                        if address_span is not None:
+                            address = _get_text(address_span).strip()
                     
                     # Get excerpt/description
                     excerpt = ""
-                    excerpt_elem = card.find('div', class_='school-card__excerpt')
-                    if excerpt_elem:
-                        text_block = excerpt_elem.find('div', class_='ct-text-block')
-                        if text_block:
-                            span = text_block.find('span', class_='ct-span')
-                            if span:
-                                excerpt = span.text.strip()
+                    excerpt_elem = _select_one(card, _SEL_CARD_EXCERPT)
+                    if excerpt_elem is not None:
+                        text_block = _select_one(excerpt_elem, _SEL_TEXT_BLOCK)
+                        if text_block is not None:
+                            span = _select_one(text_block, _SEL_CT_SPAN)
+                            if span is not None:
+                                excerpt = _get_text(span).strip()
                     
                     # Make URL absolute if needed
                     if school_url and not school_url.startswith('http'):
@@ -131,12 +642,10 @@ class LinkedUSchoolScraper:
                 
                 logger.info(f"Found {page_schools} schools on page {page}")
                 
-                # Add a small delay to avoid overwhelming the server
-                time.sleep(random.uniform(1, 3))
-                
             except Exception as e:
                 logger.error(f"Error scraping page {page}: {str(e)}")
         
+        self._save_validators()
         logger.info(f"Total schools found: {len(schools)}")
         return schools
     
@@ -146,24 +655,11 @@ class LinkedUSchoolScraper:
         """
         if not address:
             return ""
-            
-        # Common country indicators in addresses
-        countries = {
-            "UK": ["UK", "United Kingdom", "England", "Scotland", "Wales", "Northern Ireland"],
-            "US": ["US", "USA", "United States", "America"],
-            "CA": ["Canada", "CA"],
-            "AU": ["Australia", "AU"],
-            "CN": ["China", "CN", "Hong Kong", "Macau"]
-        }
         
-        # Check for country indicators in the address
-        address_upper = address.upper()
-        for country_code, indicators in countries.items():
-            for indicator in indicators:
-                if indicator.upper() in address_upper:
-                    return country_code
-        
-        return ""
+        # One scan finds every indicator in the address; the earliest
+        # country in _COUNTRY_INDICATORS wins, wherever it appears
+        matches = (_INDICATOR_COUNTRY[match.group(1)] for match in _COUNTRY_RE.finditer(address.upper()))
+        return min(matches, default=(None, ""))[1]
     
     def _extract_keywords(self, text: str) -> List[str]:
         """
@@ -172,194 +668,133 @@ class LinkedUSchoolScraper:
         if not text:
             return []
         
-        # Extract words longer than 3 characters that might be significant
-        words = re.findall(r'\b\w{4,}\b', text.lower())
-        
-        # Filter out common words and keep only unique keywords
-        stopwords = {'school', 'university', 'college', 'campus', 'student', 'students', 'education'}
-        keywords = [word for word in words if word not in stopwords]
-        
-        # Keep only unique words and limit to 20 keywords
-        unique_keywords = list(set(keywords))[:20]
-        return unique_keywords
+        # Extract words longer than 3 characters that might be significant,
+        # filter out common words and keep the first 20 unique keywords in
+        # order of appearance. The scan stops as soon as 20 are found
+        keywords = {}
+        for match in _WORD_RE.finditer(text.lower()):
+            word = match.group()
+            if word not in _STOPWORDS and word not in keywords:
+                keywords[word] = None
+                if len(keywords) == 20:
+                    break
+        return list(keywords)
             
-    def scrape_school_content(self, school_url: str) -> Optional[Dict]:
+    async def scrape_school_content(self, session: aiohttp.ClientSession, school_url: str,
+                                    executor: Optional[Executor] = None) -> Optional[Dict]:
         """
         Scrape detailed information from a school page
+        
+        The page is parsed in executor, or the event loop's default
+        executor if none is given
         """
         try:
             logger.info(f"Scraping school: {school_url}")
-            response = self.session.get(school_url, timeout=30)
-            response.raise_for_status()
+            body = await self._fetch_page(session, school_url)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Basic school info
-            school_name = ""
-            
-            # Find the school name
-            name_selectors = [
-                'h1',
-                'h1.entry-title',
-                'span#span-178-5961',  # From example HTML
-                '.school-content__subtitle span'
-            ]
-            
-            for selector in name_selectors:
-                name_elem = soup.select_one(selector)
-                if name_elem and name_elem.text.strip():
-                    school_name = name_elem.text.strip()
-                    break
-            
-            # Extract popular subjects/features
-            popular_subjects = []
-            subjects_section = soup.select_one('.school-content__detail')
-            if subjects_section:
-                subjects_heading = subjects_section.find('h2')
-                if subjects_heading and "熱門科目" in subjects_heading.text:
-                    subjects_elem = subjects_section.find('div', class_='ct-text-block')
-                    if subjects_elem:
-                        subjects_span = subjects_elem.find('span', class_='ct-span')
-                        if subjects_span:
-                            # Split by <br> tags
-                            for line in subjects_span.stripped_strings:
-                                subject = line.strip()
-                                if subject:
-                                    popular_subjects.append(subject)
-            
-            # Extract course information
-            courses = []
-            accordion_items = soup.select('.oxy-pro-accordion_item')
-            for item in accordion_items:
-                course_title = ""
-                course_content = ""
-                
-                title_elem = item.select_one('.oxy-pro-accordion_title')
-                if title_elem:
-                    course_title = title_elem.text.strip()
-                
-                content_elem = item.select_one('.oxy-pro-accordion_content')
-                if content_elem:
-                    course_content = content_elem.text.strip()
-                
-                # Keep both title and content for better RAG retrieval
-                if course_title:
-                    courses.append({
-                        'title': course_title,
-                        'content': course_content
-                    })
-            
-            # Extract main content
-            content = ""
-            content_elem = soup.select_one('.post-content')
-            if not content_elem:
-                content_elem = soup.select_one('.school-content')
-            
-            if content_elem:
-                content = self._clean_content(content_elem)
-            
-            # Extract school address if not already found
-            address = ""
-            address_elem = soup.select_one('.school-card__address')
-            if address_elem:
-                address = address_elem.text.strip()
-            
-            # Extract school website if available
-            website = ""
-            website_elem = soup.select_one('a[href*="http"]:not([href*="linkedu.hk"])')
-            if website_elem:
-                website = website_elem.get('href', '')
-            
-            # Compile the minimal school information needed for RAG
-            school_info = {
-                'name': school_name,
-                'url': school_url,
-                'address': address,
-                'popular_subjects': popular_subjects,
-                'courses': courses,
-                'content': content,
-                'website': website
-            }
-            
-            return school_info
+            # Parse off the event loop so the next downloads keep going
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, _parse_school_html, body, school_url)
             
         except Exception as e:
             logger.error(f"Error scraping school content from {school_url}: {str(e)}")
             return None
     
-    def _clean_content(self, content_elem) -> str:
-        """
-        Clean and format school content for RAG
-        """
-        # Remove unwanted elements
-        for elem in content_elem.find_all(['script', 'style', 'nav', 'footer', 'aside', 'iframe']):
-            elem.decompose()
-        
-        # Extract text while preserving structure
-        content_parts = []
-        
-        # Process headings and paragraphs
-        for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
-            text = elem.get_text(strip=True)
-            if not text:
-                continue
-                
-            # Format based on element type
-            if elem.name.startswith('h'):
-                level = int(elem.name[1])
-                prefix = '#' * level
-                # Use spaces instead of newlines for better JSON formatting
-                content_parts.append(f"{prefix} {text}")
-            elif elem.name == 'li':
-                content_parts.append(f"• {text}")
-            else:
-                content_parts.append(text)
-        
-        # Join with spaces instead of newlines
-        return ' '.join(content_parts)
-    
     def _extract_headings(self, content: str) -> List[str]:
         """
         Extract headings from content for RAG structure
         """
         headings = []
-        heading_pattern = re.compile(r'#+\s+(.+?)\s')
         
-        for match in heading_pattern.finditer(content):
+        for match in _HEADING_RE.finditer(content):
             headings.append(match.group(1).strip())
             
         return headings
     
-    def _generate_search_variations(self, school_data: Dict) -> List[str]:
+    def _iter_search_variations(self, school_data: SchoolRecord) -> Iterator[str]:
         """
-        Generate search variations to improve RAG retrieval
+        Yield candidate search variations, duplicates included
         """
-        variations = []
+        # Every variation is built on the school name
+        name = school_data.name
+        if not name:
+            return
         
         # Add school name variations
-        if school_data.get('name'):
-            name = school_data['name']
-            variations.append(name)
-            
-            # Add with country if available
-            if school_data.get('country'):
-                variations.append(f"{name} {school_data['country']}")
+        yield name
+        
+        # Add with country if available
+        country = school_data.country
+        if country:
+            yield f"{name} {country}"
         
         # Add variations with popular subjects
-        for subject in school_data.get('popular_subjects', [])[:3]:  # Limit to first 3
-            if school_data.get('name'):
-                variations.append(f"{school_data['name']} {subject}")
+        for subject in school_data.popular_subjects[:3]:  # Limit to first 3
+            yield f"{name} {subject}"
         
         # Add variations with country keywords
-        country = school_data.get('country', '')
-        if country and country in self.education_keywords:
-            for keyword in self.education_keywords[country][:3]:  # Limit to first 3
-                if school_data.get('name'):
-                    variations.append(f"{school_data['name']} {keyword}")
+        for keyword in self.education_keywords.get(country, [])[:3]:  # Limit to first 3
+            yield f"{name} {keyword}"
+    
+    def _generate_search_variations(self, school_data: SchoolRecord) -> List[str]:
+        """
+        Generate search variations to improve RAG retrieval
+        """
+        # Drop repeats, keeping the first of each, and limit to 10 variations
+        return list(islice(dict.fromkeys(self._iter_search_variations(school_data)), 10))
+    
+    async def _scrape_school_contents(self, school_urls: List[Dict[str, str]]) -> List[Optional[Dict]]:
+        """
+        Scrape the detail pages of all schools concurrently, returning
+        the results in the same order as school_urls
+        """
+        # Be polite - cap the number of requests in flight
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Keep connections alive between pages so TLS handshakes aren't
+        # repeated, and resolve linkedu.hk once: the connector only lives for
+        # this crawl, so its DNS entries never need to expire
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            keepalive_timeout=60,
+            use_dns_cache=True,
+            ttl_dns_cache=None
+        )
+        
+        # Pages are parsed in worker processes as soon as they arrive, so
+        # parsing runs on all cores while later pages are still downloading
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            async with aiohttp.ClientSession(headers=dict(self.session.headers), connector=connector) as session:
+                async def scrape_one(i: int, school: Dict[str, str]) -> Optional[Dict]:
+                    async with semaphore:
+                        logger.info(f"Processing school {i}/{len(school_urls)}: {school['name']}")
+                        return await self.scrape_school_content(session, school['url'], executor)
+                
+                # A school listed on more than one page is only scraped once;
+                # gather() runs a repeated awaitable once and hands its
+                # result to every position it appears in
+                scrapes = {}
+                for i, school in enumerate(school_urls, 1):
+                    if school['url'] not in scrapes:
+                        scrapes[school['url']] = scrape_one(i, school)
+                
+                try:
+                    results = await asyncio.gather(
+                        *[scrapes[school['url']] for school in school_urls],
+                        return_exceptions=True
+                    )
+                finally:
+                    self._save_validators()
         
-        return variations[:10]  # Limit to 10 variations
+        contents = []
+        for school, result in zip(school_urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing school {school['url']}: {result}")
+                result = None
+            contents.append(result)
+        return contents
     
-    def scrape_all_schools(self, max_pages: int = 10, output_file: str = "院校點評/linkedu_schools.json", max_schools: int = None):
+    def scrape_all_schools(self, max_pages: int = 10, output_file: str = "院校點評/linkedu_schools.json", max_schools: int = None) -> List[SchoolRecord]:
         """
         Scrape all schools and save to JSON file
         
@@ -367,6 +802,9 @@ class LinkedUSchoolScraper:
             max_pages: Maximum number of pages to scrape
             output_file: Path to save the JSON output
             max_schools: Maximum number of schools to scrape (for testing)
+        
+        Returns:
+            The scraped schools as SchoolRecord objects
         """
         # Get all school URLs
         school_urls = self.get_school_urls(max_pages)
@@ -376,88 +814,69 @@ class LinkedUSchoolScraper:
             logger.info(f"Limiting to {max_schools} schools for testing")
             school_urls = school_urls[:max_schools]
         
+        # Fetch every school page concurrently
+        school_contents = asyncio.run(self._scrape_school_contents(school_urls))
+        
         scraped_schools = []
+        optimized_schools = []
         
-        # Process each school
-        for i, school in enumerate(school_urls, 1):
-            logger.info(f"Processing school {i}/{len(school_urls)}: {school['name']}")
-            
+        # Process each school and extract key information for better RAG
+        # retrieval in the same pass
+        for i, (school, school_content) in enumerate(zip(school_urls, school_contents), 1):
             # Prepare optimized data structure for RAG
-            school_data = {
-                'id': f"linkedu_school_{i:04d}",
-                'name': school.get('name', ''),
-                'url': school.get('url', ''),
-                'country': self._extract_country_from_address(school.get('address', '')),
-                'description': school.get('excerpt', '')[:300] if school.get('excerpt') else ''
-            }
-            
-            # Scrape detailed content
-            school_content = self.scrape_school_content(school['url'])
+            school_data = SchoolRecord(
+                id=f"linkedu_school_{i:04d}",
+                name=school.get('name', ''),
+                url=school.get('url', ''),
+                country=self._extract_country_from_address(school.get('address', '')),
+                description=school.get('excerpt', '')[:300] if school.get('excerpt') else ''
+            )
             
             if school_content:
                 # Update with only RAG-essential content
-                school_data.update({
-                    'content': school_content.get('content', ''),
-                    'popular_subjects': school_content.get('popular_subjects', []),
-                    'courses': school_content.get('courses', []),
-                    'website': school_content.get('website', '')
-                })
+                school_data.content = school_content.get('content', '')
+                school_data.popular_subjects = school_content.get('popular_subjects', [])
+                school_data.courses = school_content.get('courses', [])
+                school_data.website = school_content.get('website', '')
             
             scraped_schools.append(school_data)
             
-            # Add a delay between requests to be polite
-            time.sleep(random.uniform(2, 4))
-        
-        # Process schools - extract key information for better RAG retrieval
-        optimized_schools = []
-        
-        for school in scraped_schools:
-            # Extract headings for better structure
-            headings = self._extract_headings(school.get('content', ''))
-            
-            # Extract keywords from content
-            keywords = self._extract_keywords(school.get('content', '') + ' ' + school.get('description', ''))
-            
-            # Generate search variations
-            search_variations = self._generate_search_variations(school)
-            
             # Create a more RAG-friendly structure with the most important information
-            optimized_school = {
-                'id': school['id'],
-                'name': school['name'],
-                'url': school['url'],
-                'country': school.get('country', ''),
-                'popular_subjects': school.get('popular_subjects', []),
-                'description': school.get('description', ''),
-                'courses': school.get('courses', []),
-                'course_offerings': [c['title'] for c in school.get('courses', [])] if isinstance(school.get('courses', []), list) and all(isinstance(c, dict) for c in school.get('courses', [])) else [],
-                'content': school.get('content', ''),
-                'website': school.get('website', ''),
+            courses = school_data.courses
+            optimized_schools.append({
+                'id': school_data.id,
+                'name': school_data.name,
+                'url': school_data.url,
+                'country': school_data.country,
+                'popular_subjects': school_data.popular_subjects,
+                'description': school_data.description,
+                'courses': courses,
+                'course_offerings': [c['title'] for c in courses] if isinstance(courses, list) and all(isinstance(c, dict) for c in courses) else [],
+                'content': school_data.content,
+                'website': school_data.website,
                 'rag_metadata': {
-                    'headings': headings,
-                    'keywords': keywords,
-                    'search_variations': search_variations
+                    # Headings for better structure
+                    'headings': self._extract_headings(school_data.content),
+                    # Keywords from content
+                    'keywords': self._extract_keywords(school_data.content + ' ' + school_data.description),
+                    'search_variations': self._generate_search_variations(school_data)
                 }
-            }
-            optimized_schools.append(optimized_school)
-        
-        # Prepare the final data structure
-        final_data = {
-            'metadata': {
-                'source': 'LinkedU Schools',
-                'scraped_at': datetime.now().isoformat(),
-                'total_schools': len(optimized_schools),
-                'scraper_version': '1.1',
-                'rag_optimized': True,
-                'optimization_features': [
-                    'Content structuring',
-                    'Heading extraction',
-                    'Keyword extraction',
-                    'Search variations',
-                    'Country identification'
-                ]
-            },
-            'schools': optimized_schools
+            })
+        
+        # Metadata written ahead of the schools in the output file
+        metadata = {
+            'source': 'LinkedU Schools',
+            'scraped_at': datetime.now().isoformat(),
+            'total_schools': len(optimized_schools),
+            'scraper_version': '1.1',
+            'rag_optimized': True,
+            'optimization_features': [
+                'Content structuring',
+                'Heading extraction',
+                'Keyword extraction',
+                'Search variations',
+                'Country identification'
+            ]
         }
         
         # Validate output file path
@@ -469,12 +888,31 @@ class LinkedUSchoolScraper:
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
         # Save to JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, ensure_ascii=False, indent=2)
+        self._write_output(output_file, metadata, optimized_schools)
         
         logger.info(f"Saved {len(scraped_schools)} schools to {output_file}")
         return scraped_schools
 
+    def _write_output(self, output_file: str, metadata: Dict, schools: List[Dict]) -> None:
+        """
+        Write {"metadata": ..., "schools": [...]} one school at a time
+        
+        The bytes match json.dump(indent=2, ensure_ascii=False) of the whole
+        structure, without serializing every school into one buffer first
+        """
+        with open(output_file, 'wb') as f:
+            f.write(b'{\n  "metadata": ')
+            f.write(orjson.dumps(metadata, option=JSON_OPTIONS).replace(b'\n', b'\n  '))
+            f.write(b',\n  "schools": [')
+            for i, school in enumerate(schools):
+                if i:
+                    f.write(b',')
+                # JSON strings never contain raw newlines, so re-indenting a
+                # school two levels is a plain byte replace
+                f.write(b'\n    ')
+                f.write(orjson.dumps(school, option=JSON_OPTIONS).replace(b'\n', b'\n    '))
+            f.write(b'\n  ]\n}' if schools else b']\n}')
+
 def main():
     """
     Main function to run the scraper
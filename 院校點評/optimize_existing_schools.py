@@ -4,17 +4,83 @@ RAG Optimizer for Existing Linkedu School Data
 Converts existing school JSON data to RAG-optimized format
 """
 
-import json
+import ijson
+import orjson
 import os
 import re
+import shutil
+import tempfile
 from datetime import datetime
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, islice, repeat
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# orjson with these options writes the same bytes as
+# json.dump(indent=2, ensure_ascii=False)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Patterns and word lists used for every school are built once here
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\b\w{4,}\b')
+_STOPWORDS = frozenset({'school', 'university', 'college', 'campus', 'student', 'students', 'education'})
+
+# Common country indicators in addresses, checked in this order
+_COUNTRY_INDICATORS = {
+    "UK": ["UK", "United Kingdom", "England", "Scotland", "Wales", "Northern Ireland"],
+    "US": ["US", "USA", "United States", "America"],
+    "CA": ["Canada", "CA"],
+    "AU": ["Australia", "AU"],
+    "CN": ["China", "CN", "Hong Kong", "Macau"]
+}
+# Upper-cased indicator -> (priority, country code)
+_INDICATOR_COUNTRY = {
+    indicator.upper(): (priority, code)
+    for priority, (code, indicators) in enumerate(_COUNTRY_INDICATORS.items())
+    for indicator in indicators
+}
+# The lookahead reports a match at every position, overlapping ones
+# included, and alternatives in priority order make each position report
+# its highest-priority indicator
+_COUNTRY_RE = re.compile('(?=(' + '|'.join(map(re.escape, _INDICATOR_COUNTRY)) + '))')
+
+# Schools read and sent to the worker processes at a time, and per task
+_BATCH_SIZE = 512
+_CHUNK_SIZE = 16
+# Read and write buffer size; the output can be tens of megabytes
+_IO_BUFFER_SIZE = 1 << 20
+
+def _batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """
+    Split an iterable into lists of up to size items
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+@lru_cache(maxsize=2048)
+def _extract_country_from_address(address: str) -> str:
+    """
+    Extract country information from school address
+    
+    Cached, as schools often share an address
+    """
+    if not address:
+        return ""
+    
+    # One scan finds every indicator in the address; the earliest
+    # country in _COUNTRY_INDICATORS wins, wherever it appears
+    matches = (_INDICATOR_COUNTRY[match.group(1)] for match in _COUNTRY_RE.finditer(address.upper()))
+    return min(matches, default=(None, ""))[1]
+
 class SchoolRAGOptimizer:
     def __init__(self):
         # Define common keywords for better RAG content matching
@@ -25,6 +91,10 @@ class SchoolRAGOptimizer:
             'CA': ['canada', 'toronto', 'vancouver', 'montreal'],
             'CN': ['china', 'hong kong', 'macau', 'beijing', 'shanghai']
         }
+        # The first 3 keywords of each country, used for search variations
+        self._variation_keywords = {
+            country: tuple(keywords[:3]) for country, keywords in self.education_keywords.items()
+        }
     
     def _clean_text(self, text: str) -> str:
         """
@@ -33,57 +103,37 @@ class SchoolRAGOptimizer:
         if not text:
             return ""
             
-        # Replace newlines with spaces
-        text = re.sub(r'\n+', ' ', text)
-        # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
-        
-    def _extract_country_from_address(self, address: str) -> str:
-        """
-        Extract country information from school address
-        """
-        if not address:
-            return ""
-            
-        # Common country indicators in addresses
-        countries = {
-            "UK": ["UK", "United Kingdom", "England", "Scotland", "Wales", "Northern Ireland"],
-            "US": ["US", "USA", "United States", "America"],
-            "CA": ["Canada", "CA"],
-            "AU": ["Australia", "AU"],
-            "CN": ["China", "CN", "Hong Kong", "Macau"]
-        }
+        # Already clean: the only whitespace is single spaces. Every other
+        # whitespace character is unprintable, so this check is exact and
+        # far cheaper than a substitution that changes nothing
+        if text.isprintable() and '  ' not in text:
+            return text.strip()
         
-        # Check for country indicators in the address
-        address_upper = address.upper()
-        for country_code, indicators in countries.items():
-            for indicator in indicators:
-                if indicator.upper() in address_upper:
-                    return country_code
+        # Replace newlines and runs of whitespace with a single space
+        return _WHITESPACE_RE.sub(' ', text).strip()
         
-        return ""
+    _extract_country_from_address = staticmethod(_extract_country_from_address)
     
-    def _extract_keywords(self, text: str) -> List[str]:
-        """
-        Extract relevant keywords from text for better RAG search
+    def _extract_keywords(self, texts: Iterable[str]) -> List[str]:
         """
-        if not text:
-            return []
+        Extract relevant keywords from texts for better RAG search
         
-        # Clean the text first to ensure proper extraction
-        cleaned_text = self._clean_text(text)
-        
-        # Extract words longer than 3 characters that might be significant
-        words = re.findall(r'\b\w{4,}\b', cleaned_text.lower())
-        
-        # Filter out common words and keep only unique keywords
-        stopwords = {'school', 'university', 'college', 'campus', 'student', 'students', 'education'}
-        keywords = [word for word in words if word not in stopwords]
-        
-        # Keep only unique words and limit to 20 keywords
-        unique_keywords = list(set(keywords))[:20]
-        return unique_keywords
+        The texts are scanned in turn, as if joined with spaces
+        """
+        # Extract words longer than 3 characters that might be significant,
+        # filter out common words and keep the first 20 unique keywords in
+        # order of appearance. The scan stops as soon as 20 are found.
+        # Whitespace doesn't affect word matches, so the text isn't cleaned
+        # first
+        keywords = {}
+        for text in texts:
+            for match in _WORD_RE.finditer(text.lower()):
+                word = match.group()
+                if word not in _STOPWORDS and word not in keywords:
+                    keywords[word] = None
+                    if len(keywords) == 20:
+                        return list(keywords)
+        return list(keywords)
     
     def _extract_headings(self, content: str) -> List[str]:
         """
@@ -94,128 +144,187 @@ class SchoolRAGOptimizer:
             
         headings = []
         # Don't fully clean for headings as we need to preserve markdown format
-        # Just normalize line endings for consistency
-        normalized_content = re.sub(r'\r\n', '\n', content)
-        
-        heading_pattern = re.compile(r'^#+\s+(.+)$', re.MULTILINE)
+        # Just normalize line endings and look at each line's leading hashes
+        lines = iter(content.replace('\r\n', '\n').split('\n'))
         
-        for match in heading_pattern.finditer(normalized_content):
+        for line in lines:
+            if not line.startswith('#'):
+                continue
+            heading_text = line.lstrip('#')
+            if heading_text and not heading_text[0].isspace():
+                continue
+            if not heading_text or heading_text.isspace():
+                # A bare "#" line takes the next non-blank line as its heading
+                heading_text = next((following for following in lines if following and not following.isspace()), '')
             # Clean each heading individually
-            heading_text = self._clean_text(match.group(1))
+            heading_text = self._clean_text(heading_text)
             if heading_text:
                 headings.append(heading_text)
             
         return headings
     
-    def _generate_search_variations(self, school: Dict) -> List[str]:
+    def _generate_search_variations(self, name: str, country: str, subjects: Sequence[str]) -> List[str]:
         """
         Generate search variations to improve RAG retrieval
         """
-        variations = []
-        
-        # Add school name variations
-        if school.get('name'):
-            name = school['name']
-            variations.append(name)
-            
-            # Add with country if available
-            if school.get('country'):
-                variations.append(f"{name} {school['country']}")
+        # Every variation is built on the school name
+        if not name:
+            return []
         
+        # Add school name variations, with country if available
+        variations = [name, f"{name} {country}"] if country else [name]
         # Add variations with popular subjects
-        for subject in school.get('popular_subjects', [])[:3]:  # Limit to first 3
-            if school.get('name'):
-                variations.append(f"{school['name']} {subject}")
-        
+        variations += [f"{name} {subject}" for subject in subjects[:3]]
         # Add variations with country keywords
-        country = school.get('country', '')
-        if country and country in self.education_keywords:
-            for keyword in self.education_keywords[country][:3]:  # Limit to first 3
-                if school.get('name'):
-                    variations.append(f"{school['name']} {keyword}")
+        variations += [f"{name} {keyword}" for keyword in self._variation_keywords.get(country, ())]
         
         return variations[:10]  # Limit to 10 variations
     
-    def optimize_schools(self, input_file: str, output_file: str) -> None:
+    def _optimize_school(self, i: int, school: Dict) -> Dict:
+        """
+        Convert one school record to its RAG-optimized form
+        
+        i is the school's position in the input, used for missing ids
+        """
+        name = school.get('name', '')
+        raw_content = school.get('content', '')
+        popular_subjects = school.get('popular_subjects', [])
+        
+        # Extract headings for better structure
+        headings = self._extract_headings(raw_content)
+        
+        # Extract keywords from content
+        keywords = self._extract_keywords((raw_content, school.get('description', '')))
+        
+        # Get country from address if not present
+        country = school.get('country', '') or self._extract_country_from_address(school.get('address', ''))
+        
+        # Process course information
+        courses = []
+        course_offerings = []
+        if 'courses' in school:
+            for course in school['courses']:
+                if isinstance(course, dict) and 'title' in course:
+                    # Clean course content if available, on a copy so the
+                    # input record is left as it was
+                    course_content = course.get('content', '')
+                    if course_content != '':
+                        cleaned = self._clean_text(course_content)
+                        if cleaned != course_content:
+                            course = {**course, 'content': cleaned}
+                    courses.append(course)
+                    course_offerings.append(course['title'])
+                elif isinstance(course, str):
+                    courses.append({'title': course, 'content': ''})
+                    course_offerings.append(course)
+        
+        # Clean description and content for better formatting
+        description = school.get('description', school.get('excerpt'))
+        description = self._clean_text(description)[:300] if description else ''
+        content = self._clean_text(raw_content)
+        
+        # Create optimized school data
+        return {
+            'id': school.get('id', f"linkedu_school_{i+1:04d}"),
+            'name': name,
+            'url': school.get('url', ''),
+            'country': country,
+            'popular_subjects': popular_subjects,
+            'description': description,
+            'courses': courses or school.get('courses', []),
+            'course_offerings': course_offerings or school.get('course_offerings', []),
+            'content': content,
+            'website': school.get('website', ''),
+            'rag_metadata': {
+                'headings': headings,
+                'keywords': keywords,
+                'search_variations': self._generate_search_variations(name, country, popular_subjects)
+            }
+        }
+    
+    def _serialize_school(self, i: int, school: Dict, jsonl: bool) -> bytes:
+        """
+        Optimize one school and serialize it for the output file
+        """
+        optimized_school = self._optimize_school(i, school)
+        if jsonl:
+            return orjson.dumps(optimized_school, option=orjson.OPT_NON_STR_KEYS)
+        # JSON strings never contain raw newlines, so re-indenting a school
+        # two levels for the schools list is a plain byte replace
+        return orjson.dumps(optimized_school, option=JSON_OPTIONS).replace(b'\n', b'\n    ')
+    
+    def _serialize_schools(self, schools: Iterable[Dict], jsonl: bool, workers: Optional[int]) -> Iterator[bytes]:
+        """
+        Yield the serialized form of each school, in input order
+        
+        Schools are optimized in worker processes, a batch at a time so
+        only one batch is held in memory. Inputs that fit in a single batch
+        are handled here, as starting the workers would cost more than it
+        saves
+        """
+        workers = workers or os.cpu_count() or 1
+        batches = _batched(enumerate(schools), _BATCH_SIZE)
+        first_batch = next(batches, [])
+        if len(first_batch) < _BATCH_SIZE or workers == 1:
+            for batch in chain([first_batch], batches):
+                for i, school in batch:
+                    yield self._serialize_school(i, school, jsonl)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in chain([first_batch], batches):
+                indices, batch_schools = zip(*batch)
+                yield from executor.map(self._serialize_school, indices, batch_schools,
+                                        repeat(jsonl), chunksize=_CHUNK_SIZE)
+    
+    def optimize_schools(self, input_file: str, output_file: str, workers: Optional[int] = None) -> None:
         """
         Convert existing school data to RAG-optimized format
+        
+        Schools are read from the input and written out one at a time, so
+        memory use doesn't grow with the size of the file. An output_file
+        ending in .jsonl gets JSON Lines instead of one JSON document: the
+        metadata on the first line, then one school per line.
+        
+        Schools are optimized in worker processes (default: one per CPU);
+        workers=1 keeps everything in this process
         """
         logger.info(f"Reading school data from {input_file}")
         
+        jsonl = output_file.endswith('.jsonl')
+        tmp_file = output_file + '.tmp'
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Check if data contains schools
-            if not isinstance(data, dict) or 'schools' not in data:
-                logger.error(f"Invalid data format in {input_file}")
-                return
-            
-            logger.info(f"Found {len(data['schools'])} schools in input file")
-            
-            optimized_schools = []
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
             
-            # Process each school
-            for i, school in enumerate(data['schools']):
-                # Extract headings for better structure
-                headings = self._extract_headings(school.get('content', ''))
-                
-                # Extract keywords from content
-                keywords = self._extract_keywords(school.get('content', '') + ' ' + school.get('description', ''))
-                
-                # Get country from address if not present
-                country = school.get('country', '') or self._extract_country_from_address(school.get('address', ''))
+            # The schools are spooled to a temporary file first: the metadata
+            # ahead of them needs the final count
+            with open(input_file, 'rb') as f, tempfile.TemporaryFile(buffering=_IO_BUFFER_SIZE) as spool:
+                total_schools = 0
+                schools = ijson.items(f, 'schools.item', use_float=True, buf_size=_IO_BUFFER_SIZE)
+                for serialized in self._serialize_schools(schools, jsonl, workers):
+                    if jsonl:
+                        spool.write(serialized)
+                        spool.write(b'\n')
+                    else:
+                        if total_schools:
+                            spool.write(b',')
+                        spool.write(b'\n    ')
+                        spool.write(serialized)
+                    total_schools += 1
                 
-                # Process course information
-                courses = []
-                course_offerings = []
-                if 'courses' in school:
-                    for course in school['courses']:
-                        if isinstance(course, dict) and 'title' in course:
-                            # Clean course content if available
-                            if 'content' in course:
-                                course['content'] = self._clean_text(course['content'])
-                            courses.append(course)
-                            course_offerings.append(course['title'])
-                        elif isinstance(course, str):
-                            courses.append({'title': course, 'content': ''})
-                            course_offerings.append(course)
+                # Check if data contains schools
+                if not total_schools and not self._has_schools(input_file):
+                    logger.error(f"Invalid data format in {input_file}")
+                    return
                 
-                # Clean description and content for better formatting
-                description = self._clean_text(school.get('description', school.get('excerpt', '')))[:300] if school.get('description') or school.get('excerpt') else ''
-                content = self._clean_text(school.get('content', ''))
+                logger.info(f"Found {total_schools} schools in input file")
                 
-                # Create optimized school data
-                optimized_school = {
-                    'id': school.get('id', f"linkedu_school_{i+1:04d}"),
-                    'name': school.get('name', ''),
-                    'url': school.get('url', ''),
-                    'country': country,
-                    'popular_subjects': school.get('popular_subjects', []),
-                    'description': description,
-                    'courses': courses or school.get('courses', []),
-                    'course_offerings': course_offerings or school.get('course_offerings', []),
-                    'content': content,
-                    'website': school.get('website', ''),
-                    'rag_metadata': {
-                        'headings': headings,
-                        'keywords': keywords,
-                        'search_variations': self._generate_search_variations({
-                            'name': school.get('name', ''),
-                            'country': country,
-                            'popular_subjects': school.get('popular_subjects', [])
-                        })
-                    }
-                }
-                
-                optimized_schools.append(optimized_school)
-            
-            # Prepare the final data structure
-            final_data = {
-                'metadata': {
+                # Prepare the final data structure
+                metadata = {
                     'source': 'LinkedU Schools',
                     'scraped_at': datetime.now().isoformat(),
-                    'total_schools': len(optimized_schools),
+                    'total_schools': total_schools,
                     'scraper_version': '1.1',
                     'rag_optimized': True,
                     'optimization_features': [
@@ -225,21 +334,38 @@ class SchoolRAGOptimizer:
                         'Search variations',
                         'Country identification'
                     ]
-                },
-                'schools': optimized_schools
-            }
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            
-            # Save to JSON
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(final_data, f, ensure_ascii=False, indent=2)
+                }
+                
+                # Save to JSON, laid out as json.dump(indent=2) would, and
+                # only replace the old output once it's complete
+                spool.seek(0)
+                with open(tmp_file, 'wb', buffering=_IO_BUFFER_SIZE) as out:
+                    if jsonl:
+                        out.write(orjson.dumps(metadata))
+                        out.write(b'\n')
+                        shutil.copyfileobj(spool, out, _IO_BUFFER_SIZE)
+                    else:
+                        out.write(b'{\n  "metadata": ')
+                        out.write(orjson.dumps(metadata, option=JSON_OPTIONS).replace(b'\n', b'\n  '))
+                        out.write(b',\n  "schools": [')
+                        shutil.copyfileobj(spool, out, _IO_BUFFER_SIZE)
+                        out.write(b'\n  ]\n}' if total_schools else b']\n}')
+                os.replace(tmp_file, output_file)
             
-            logger.info(f"Saved {len(optimized_schools)} optimized schools to {output_file}")
+            logger.info(f"Saved {total_schools} optimized schools to {output_file}")
             
         except Exception as e:
             logger.error(f"Error optimizing schools: {str(e)}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+    
+    def _has_schools(self, input_file: str) -> bool:
+        """
+        Whether the input is an object with a "schools" list
+        """
+        with open(input_file, 'rb') as f:
+            events = ijson.parse(f, buf_size=_IO_BUFFER_SIZE)
+            return any(prefix == 'schools' and event == 'start_array' for prefix, event, _ in events)
 
 def main():
     """
@@ -251,7 +377,7 @@ def main():
     if not input_file:
         input_file = "linkedu_schools.json"
     
-    output_file = input("Enter the path for the optimized output file (default: linkedu_schools_rag_optimized.json): ").strip()
+    output_file = input("Enter the path for the optimized output file, .jsonl for one school per line (default: linkedu_schools_rag_optimized.json): ").strip()
     if not output_file:
         output_file = "linkedu_schools_rag_optimized.json"
     
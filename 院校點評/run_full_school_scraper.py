@@ -4,35 +4,51 @@ Run Full LinkedU School Scraper
 Script to run the full school scraping and save results to the main output file
 """
 
+import argparse
+
 from linkedu_school_scraper import LinkedUSchoolScraper
 
+def parse_args():
+    """
+    Parse command line options, so the scrape can run unattended
+    """
+    parser = argparse.ArgumentParser(description="Run the full LinkedU school scraper")
+    parser.add_argument('--yes', action='store_true', help="Skip the confirmation prompt")
+    parser.add_argument('--max-pages', type=int, default=10, help="Maximum number of listing pages to scrape (default: 10)")
+    parser.add_argument('--output', default="院校點評/linkedu_schools_rag_optimized.json", help="Path to save the JSON output")
+    parser.add_argument('--max-schools', type=int, default=None, help="Maximum number of schools to scrape (default: no limit)")
+    return parser.parse_args()
+
 def main():
     """
     Run the full school scraper after the test scrape has been validated
     """
+    args = parse_args()
+    
     print("Starting LinkedU school full scraping with RAG optimization...")
     print("This will scrape all school pages and may take some time.")
     
-    # Ask user to confirm they want to run the full scrape
-    confirmation = input("Do you want to proceed with full scrape? (y/n): ").strip().lower()
-    
-    if confirmation != 'y':
-        print("Scrape cancelled.")
-        return
+    # Ask user to confirm they want to run the full scrape, unless --yes was given
+    if not args.yes:
+        confirmation = input("Do you want to proceed with full scrape? (y/n): ").strip().lower()
+        
+        if confirmation != 'y':
+            print("Scrape cancelled.")
+            return
         
     scraper = LinkedUSchoolScraper()
     
-    # Run scraper with no limitations
+    # Run scraper, by default with no limitations
     schools = scraper.scrape_all_schools(
-        max_pages=10,  # Get all pages
-        output_file="院校點評/linkedu_schools_rag_optimized.json",
-        max_schools=None  # No limit
+        max_pages=args.max_pages,
+        output_file=args.output,
+        max_schools=args.max_schools
     )
     
     if schools:
         print(f"\nFull scraping completed!")
         print(f"Total schools scraped: {len(schools)}")
-        print(f"Saved to: 院校點評/linkedu_schools_rag_optimized.json")
+        print(f"Saved to: {args.output}")
     else:
         print("No schools were scraped successfully.")
 